@@ -0,0 +1,142 @@
+# -> imports
+import network as _network
+import fitness as _fitness
+from world import PREY, PREDATOR
+import numpy as np
+import heapq
+import json
+import os
+
+# -> one index record per archived brain, the genome itself lives at offset in the genomes file
+recordType = np.dtype([
+    ('species', np.int8),
+    ('fitness', np.float64),
+    ('lifetime', np.int64),
+    ('kills', np.int64),
+    ('tick', np.int64),
+    ('offset', np.int64),
+    ('length', np.int64),
+    ('topology', np.int64),
+])
+
+# Append only hall of fame of every brain that died, memory mapped so it can grow past RAM
+# -> path.index holds the fixed size records, path.genomes the float32 parameters and path.json the topologies
+# -> a min heap per species keeps the topK fittest records, sample() draws respawn brains from them
+class GenomeArchive:
+    def __init__(self, path, topK=100, rng=None):
+        self.path = path
+        self.topK = topK
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.fitness = dict(_fitness.defaultFitness) # -> Simulation shares its own fitness functions
+        self.topologies = []
+        if os.path.exists(path + '.json'):
+            with open(path + '.json') as file:
+                self.topologies = json.load(file)
+        self.indexFile = open(path + '.index', 'ab')
+        self.genomeFile = open(path + '.genomes', 'ab')
+        self.count = os.path.getsize(path + '.index') // recordType.itemsize
+        self.genomeSize = os.path.getsize(path + '.genomes') // 4
+        self.mapped = (None, None)
+        self.rebuild()
+
+    def records(self):
+        # -> memory mapped views of both files, remapped only when they have grown
+        index, genomes = self.mapped
+        if index is None or len(index) < self.count:
+            self.indexFile.flush()
+            self.genomeFile.flush()
+            index = np.memmap(self.path + '.index', dtype=recordType, mode='r', shape=(self.count,)) if self.count else np.empty(0, dtype=recordType)
+            genomes = np.memmap(self.path + '.genomes', dtype=np.float32, mode='r', shape=(self.genomeSize,)) if self.genomeSize else np.empty(0, dtype=np.float32)
+            self.mapped = (index, genomes)
+        return index[:self.count], genomes
+
+    def rebuild(self):
+        # -> the top records per species from the whole index, one vectorized pass
+        index, _ = self.records()
+        self.heaps = {}
+        for species in (PREY, PREDATOR):
+            ids = np.nonzero(index['species'] == species)[0]
+            ids = ids[np.lexsort((ids, index['fitness'][ids]))[max(0, len(ids) - self.topK):]] # -> ties go to the later record, like the heap
+            self.heaps[species] = [(float(index['fitness'][idx]), int(idx)) for idx in ids]
+            heapq.heapify(self.heaps[species])
+
+    def value(self, species, lifetime, kills):
+        slope, offset = self.fitness[species](kills)
+        return slope * lifetime + offset
+
+    def topologyId(self, net):
+        description = _network.describe(net)
+        if description not in self.topologies:
+            self.topologies.append(description)
+            with open(self.path + '.json', 'w') as file:
+                json.dump(self.topologies, file)
+        return self.topologies.index(description)
+
+    def record(self, creatures, tick):
+        # -> appends every creature with its final fitness, returns the number recorded
+        if not creatures:
+            return 0
+        records = np.zeros(len(creatures), dtype=recordType)
+        records['species'] = [PREY if creature.type == 'PREY' else PREDATOR for creature in creatures]
+        records['lifetime'] = [creature.lifetime for creature in creatures]
+        records['kills'] = [creature.kills for creature in creatures]
+        records['tick'] = tick
+        records['fitness'] = [self.value(*row) for row in zip(records['species'].tolist(), records['lifetime'].tolist(), records['kills'].tolist())]
+        for row, creature in enumerate(creatures):
+            net = creature.network
+            if net.genome is None:
+                net.pack()
+            records['offset'][row], records['length'][row] = self.genomeSize, net.genome.data.size
+            records['topology'][row] = self.topologyId(net)
+            self.genomeFile.write(net.genome.data.astype(np.float32).tobytes())
+            self.genomeSize += net.genome.data.size
+        self.indexFile.write(records.tobytes())
+
+        for idx, (species, value) in enumerate(zip(records['species'].tolist(), records['fitness'].tolist()), self.count):
+            heap, entry = self.heaps[species], (value, idx)
+            if len(heap) < self.topK:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        self.count += len(records)
+        return len(records)
+
+    def best(self, species):
+        # -> (fitness, record id) of the top records, fittest first
+        return sorted(self.heaps[species], reverse=True)
+
+    def network(self, idx):
+        index, genomes = self.records()
+        record = index[idx]
+        data = np.array(genomes[record['offset']:record['offset'] + record['length']]) # -> copy out of the map
+        return _network.build(self.topologies[record['topology']], _network.Genome(data))
+
+    def sample(self, species):
+        # -> brain of a random hall of famer, None until the species has one
+        # -> drawn from the sorted list, the heap's own order depends on how it was built
+        best = self.best(species)
+        if not best:
+            return None
+        return self.network(best[self.rng.integers(len(best))][1])
+
+    def rollback(self, count):
+        # -> forgets everything recorded after the first count records, used when resuming a checkpoint
+        index, _ = self.records()
+        if count >= self.count:
+            return
+        self.genomeSize = int(index['offset'][count]) if count else 0
+        self.mapped = (None, None)
+        del index
+        self.indexFile.close()
+        self.genomeFile.close()
+        os.truncate(self.path + '.index', count * recordType.itemsize)
+        os.truncate(self.path + '.genomes', self.genomeSize * 4)
+        self.indexFile = open(self.path + '.index', 'ab')
+        self.genomeFile = open(self.path + '.genomes', 'ab')
+        self.count = count
+        self.rebuild()
+
+    def close(self):
+        self.mapped = (None, None)
+        self.indexFile.close()
+        self.genomeFile.close()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# -> benchmark suite for the simulation hot paths
+# -> python benchmark.py --output before.json
+# -> python benchmark.py --compare before.json after.json
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # -> headless pygame
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from simulation import Simulation
+import sensor as _sensor
+import brains as _brains
+import creatures as _creatures
+import numpy as np
+import argparse
+import platform
+import json
+import time
+import sys
+
+# -> screen with the default 30 creatures per 800x600 density, so a big population is not decimated by kills
+def screenFor(count):
+    scale = max(1, count / 30) ** 0.5
+    return int(800 * scale), int(600 * scale)
+
+# -> builds a simulation with exactly count creatures, a third of them predators, sensed and thought once
+# -> so rays and network inputs are real, nothing has moved, been born or died yet
+def makeSimulation(count, seed):
+    simulation = Simulation(screenFor(count), preyCount=count - count // 3, predCount=count // 3, seed=seed)
+    simulation.maxPreys = count * 2 # -> keep the population near count
+    _creatures.thinkAll(simulation.world, _sensor.senseWorld(simulation.world, simulation.grid), simulation.grid)
+    return simulation
+
+# -> calls fn repeats times after one warm up run, returns the timings in milliseconds
+def measure(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+# -> every benchmark takes a fresh simulation and returns a function to time
+def benchSensorUpdate(simulation):
+    sample = simulation.creatures[:20] # -> per creature marching is too slow to run for everyone at 3000
+    return lambda: [creature.sensor.update(simulation.creatures) for creature in sample]
+
+def benchSenseWorld(simulation):
+    return lambda: _sensor.senseWorld(simulation.world, simulation.grid)
+
+def benchNetworkPredict(simulation):
+    sample = simulation.creatures[:300]
+    inputs = [np.array(creature.intersects) for creature in sample]
+    return lambda: [creature.network.predict([sensed]) for creature, sensed in zip(sample, inputs)]
+
+def benchThink(simulation):
+    world = simulation.world
+    rays = np.array([creature.intersects for creature in world.creatures], dtype=float)
+    return lambda: _brains.think(world, rays, simulation.grid)
+
+def benchMutate(simulation):
+    children = [creature.network for creature in simulation.creatures]
+    rng = simulation.streams.mutation # -> the seeded stream, so every run mutates the same weights
+    return lambda: [_creatures.mutator.mutateNetwork(child, rng) for child in children]
+
+def benchKills(simulation):
+    # -> kills only mark prey dead, the sweep is not part of it, so revive them every run
+    world = simulation.world
+    dead = world.dead.copy()
+    def kills():
+        world.dead[:] = dead
+        simulation.resolveKills()
+    return kills
+
+def benchTick(simulation):
+    return simulation.step
+
+# -> sensor.update and network.predict time a sample of creatures, everything else the whole population
+# -> benchmarks in fresh change the population, every timed run of them gets a newly built simulation
+benchmarks = {
+    'sensor.update': benchSensorUpdate,
+    'senseWorld': benchSenseWorld,
+    'network.predict': benchNetworkPredict,
+    'brains.think': benchThink,
+    'mutate': benchMutate,
+    'kills': benchKills,
+    'tick': benchTick,
+}
+fresh = {'tick'}
+
+def run(sizes, repeats, seed, names):
+    results = {}
+    for name in names:
+        results[name] = {}
+        for size in sizes:
+            simulations = [makeSimulation(size, seed) for _ in range(repeats + 1 if name in fresh else 1)]
+            creatures = simulations[0].world.count # -> the population timed, before anything runs
+            calls = iter([benchmarks[name](simulation) for simulation in simulations])
+            timings = measure((lambda: next(calls)()) if name in fresh else next(calls), repeats)
+            results[name][str(size)] = {
+                'median_ms': float(np.median(timings)),
+                'min_ms': float(np.min(timings)),
+                'repeats': repeats,
+                'creatures': creatures,
+            }
+            for simulation in simulations:
+                simulation.close()
+            print(f"{name:<16}{size:>6} creatures  median {results[name][str(size)]['median_ms']:9.3f}ms  min {results[name][str(size)]['min_ms']:9.3f}ms")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+# -> prints old vs new medians, returns the benchmarks that got slower than threshold allows
+def compare(old, new, threshold):
+    regressions = []
+    for name, sizes in new['results'].items():
+        for size, result in sizes.items():
+            if size not in old['results'].get(name, {}):
+                continue
+            if old['results'][name][size].get('creatures') != result['creatures']: # -> different populations do not compare
+                print(f"{name:<16}{size:>6}  skipped, timed {old['results'][name][size].get('creatures')} then {result['creatures']} creatures")
+                continue
+            before, after = old['results'][name][size]['median_ms'], result['median_ms']
+            ratio = after / before if before else float('inf')
+            flag = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+            print(f"{name:<16}{size:>6}  {before:9.3f}ms -> {after:9.3f}ms  x{ratio:5.2f}  {flag}")
+            if flag == 'REGRESSION':
+                regressions.append((name, size, ratio))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks for the simulation hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[30, 300, 3000], help='population sizes to run')
+    parser.add_argument('--repeats', type=int, default=5, help='timed runs per benchmark and size')
+    parser.add_argument('--seed', type=int, default=1, help='seed for every population')
+    parser.add_argument('--only', nargs='+', default=list(benchmarks), choices=list(benchmarks), help='benchmarks to run')
+    parser.add_argument('--output', default='benchmark.json', help='where to write the results')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            old = json.load(file)
+        with open(args.compare[1]) as file:
+            new = json.load(file)
+        regressions = compare(old, new, args.threshold)
+        print(len(regressions), 'regression(s)')
+        sys.exit(1 if regressions else 0)
+
+    results = run(args.sizes, args.repeats, args.seed, args.only)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print('Results written to', args.output)
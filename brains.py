@@ -0,0 +1,111 @@
+# -> imports
+import network
+import numpy as np
+from world import memorySize
+
+# -> how many values each input adds to a network's input vector, inputs are laid out in the order a layout lists them
+# -> rays: the sensor readings, energy: energy / maxEnergy, speed: speed / topSpeed,
+# -> nearest: 1 - distance / rayLength to the closest creature of the same type in sight, 0 when there is none
+inputSizes = {'rays': 10, 'energy': 1, 'speed': 1, 'nearest': 1}
+
+# Shape of a species' brain, every network it builds has the same topology and so shares one forward plan
+# -> hidden: sizes of the hidden layers, activation: name of the network function between them (None for none)
+# -> output: name of the function on the outputs, memory: extra outputs fed back as inputs on the next tick
+# -> the defaults are the original brain, 10 rays through 6 and 4 to a sigmoid turn and throttle
+class Layout:
+    def __init__(self, inputs=network.defaultInputs, hidden=(6, 4), activation=None, output='sigmoid', memory=0):
+        unknown = [name for name in inputs if name not in inputSizes]
+        if unknown:
+            raise ValueError('unknown inputs: ' + ', '.join(unknown))
+        if memory > memorySize:
+            raise ValueError('at most ' + str(memorySize) + ' memory values')
+        self.inputs = tuple(inputs)
+        self.hidden = tuple(hidden)
+        self.activation = activation
+        self.output = output
+        self.memory = memory
+
+    @property
+    def sizes(self):
+        return [sum(inputSizes[name] for name in self.inputs) + self.memory] + list(self.hidden) + [2 + self.memory]
+
+    def build(self, rng=None):
+        # -> a new packed network with parameters drawn uniformly from [-0.5, 0.5) by rng
+        rng = rng if rng is not None else np.random.default_rng()
+        brain = network.Network()
+        sizes = self.sizes
+        for layer, (inputSize, outputSize) in enumerate(zip(sizes[:-1], sizes[1:])):
+            brain.add(network.FCLayer(inputSize, outputSize, rng=rng))
+            if self.activation is not None and layer < len(sizes) - 2:
+                brain.add(network.ActivationLayer(getattr(network, self.activation)))
+        brain.add(network.ActivationLayer(getattr(network, self.output)))
+        brain.inputs, brain.memory = self.inputs, self.memory
+        return brain.pack()
+
+# -> world fields the inputs are worked out from
+stateFields = ['pos', 'type', 'rayLength', 'energy', 'maxEnergy', 'speed', 'topSpeed', 'memory']
+
+def state(world):
+    return {name: getattr(world, name)[:world.count] for name in stateFields}
+
+def nearest(state, rows, grid=None):
+    # -> the nearest input for the creatures picked by rows, the grid must be built from state['pos']
+    pos, types, reach = state['pos'], state['type'], state['rayLength']
+    queries = np.arange(len(pos))[rows]
+    if grid is None:
+        casters, targets = np.repeat(np.arange(len(queries)), len(pos)), np.tile(np.arange(len(pos)), len(queries))
+    else:
+        casters, targets = grid.pairs(pos[queries], reach[queries].astype(float))
+    keep = (types[queries][casters] == types[targets]) & (queries[casters] != targets)
+    casters, targets = casters[keep], targets[keep]
+    distance = np.hypot(*(pos[targets] - pos[queries][casters]).T)
+    closest = np.full(len(queries), np.inf)
+    np.minimum.at(closest, casters, distance)
+    reach = reach[queries]
+    return np.where(closest < reach, 1 - closest / reach, 0)
+
+def inputs(names, memory, state, rays, rows, grid=None):
+    # -> network input rows of the creatures picked by rows for brains with these input names and memory size
+    # -> rays holds only their sensor readings, in the order the networks see them (Creature.intersects after think)
+    columns = []
+    for name in names:
+        if name == 'rays':
+            columns.append(rays)
+        elif name == 'energy':
+            columns.append((state['energy'][rows] / state['maxEnergy'][rows])[:, None])
+        elif name == 'speed':
+            columns.append((state['speed'][rows] / state['topSpeed'][rows])[:, None])
+        elif name == 'nearest':
+            columns.append(nearest(state, rows, grid)[:, None])
+    columns.append(state['memory'][rows, :memory])
+    return np.concatenate(columns, axis=1)
+
+def signature(brain):
+    # -> networks with the same signature take the same inputs and run through the same plan
+    return brain.inputs, brain.memory, network.topology(brain)
+
+def groups(brains):
+    # -> signature: indices of the brains with it
+    found = {}
+    for idx, brain in enumerate(brains):
+        found.setdefault(signature(brain), []).append(idx)
+    return found
+
+def remember(world, rows, outputs, memory):
+    # -> stores the memory outputs for the next tick
+    world.memory[rows, :memory] = outputs[:, 2:2 + memory]
+
+def think(world, rays, grid=None):
+    # -> (turn, throttle) network outputs of every creature, one stacked pass per signature group
+    # -> memory outputs go straight back into the world, the grid must be built from world.pos
+    n = world.count
+    brains = [creature.network for creature in world.creatures]
+    current = state(world)
+    outputs = np.empty((n, 2), dtype=np.float32)
+    for (names, memory, topology), members in groups(brains).items():
+        rows = np.array(members)
+        result = network.forwardPlan(topology).runStacked(network.stackGenomes([brains[idx] for idx in members]),
+                                                           inputs(names, memory, current, rays[rows], rows, grid))
+        remember(world, rows, result, memory)
+        outputs[rows] = result[:, :2]
+    return outputs
@@ -0,0 +1,154 @@
+# -> imports
+import creatures as _creatures
+import network as _network
+import world as _world
+from simulation import Simulation
+import numpy as np
+import threading
+import json
+import os
+
+version = 2
+
+# -> copies everything a tick depends on into plain arrays plus a json header
+# -> cheap enough to run between ticks, the slow part (writing) happens on the snapshot
+def snapshot(simulation):
+    world = simulation.world
+    n = world.count
+    arrays = {'world_' + name: getattr(world, name)[:n].copy() for name in _world.fields}
+
+    # -> creatures in world order, then the two best performers which may live outside the world
+    creatures = list(world.creatures)
+    best = []
+    for performer in (simulation.bestPreyPerformer, simulation.bestPredPerformer):
+        inWorld = performer.world is world and performer.index < n and world.creatures[performer.index] is performer
+        best.append(performer.index if inWorld else len(creatures))
+        if not inWorld:
+            creatures.append(performer)
+    for name in _world.fields: # -> state of the detached best performers, empty when both are alive
+        arrays['detached_' + name] = np.array([getattr(creature.world, name)[creature.index] for creature in creatures[n:]],
+                                              dtype=_world.fields[name][0]).reshape((len(creatures) - n,) + _world.fields[name][1])
+
+    # -> genomes stored once however many clones share them
+    genomes, genomeOf, topologies, topologyOf = {}, [], [], []
+    for creature in creatures:
+        net = creature.network
+        if net.genome is None:
+            net.pack()
+        genomeOf.append(genomes.setdefault(id(net.genome), (len(genomes), net.genome))[0])
+        description = _network.describe(net)
+        if description not in topologies:
+            topologies.append(description)
+        topologyOf.append(topologies.index(description))
+    data = [genome.data for _, genome in sorted(genomes.values(), key=lambda entry: entry[0])]
+    arrays['genomes'] = np.concatenate(data) if data else np.empty(0, dtype=np.float32)
+    arrays['genomeOffsets'] = np.cumsum([0] + [len(genome) for genome in data])
+    arrays['genomeOf'] = np.array(genomeOf, dtype=np.int64)
+    arrays['topologyOf'] = np.array(topologyOf, dtype=np.int64)
+    arrays['selected'] = np.array([creature.selected for creature in creatures], dtype=bool)
+    arrays['remoteControlled'] = np.array([creature.remoteControlled for creature in creatures], dtype=bool)
+    arrays['intersects'] = np.array([creature.intersects for creature in creatures], dtype=float).reshape(len(creatures), -1)
+    arrays['serials'] = np.array([creature.serial for creature in creatures], dtype=np.int64)
+
+    header = {
+        'version': version,
+        'ticks': simulation.ticks,
+        'totalKills': simulation.totalKills,
+        'serials': world.serials,
+        'screenDimensions': list(simulation.screenDimensions),
+        'preyReproductionInterval': simulation.preyReproductionInterval,
+        'maxPreys': simulation.maxPreys,
+        'best': best,
+        'topologies': topologies,
+        'streams': simulation.streams.state(),
+        'archive': {'count': simulation.archive.count} if simulation.archive else None,
+    }
+    arrays['header'] = np.array(json.dumps(header))
+    return arrays
+
+def write(arrays, path):
+    # -> written next to the target and renamed over it, a crash never leaves half a checkpoint
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(temporary, path)
+
+def save(simulation, path):
+    write(snapshot(simulation), path)
+
+# -> rebuilds a Simulation from a checkpoint, stepping it continues exactly where the saved run left off
+# -> an archive is rolled back to what it held when the checkpoint was taken
+def load(path, workers=0, profiler=None, archive=None):
+    with np.load(path) as file:
+        arrays = {name: file[name] for name in file.files}
+    header = json.loads(str(arrays['header']))
+    if header['version'] != version:
+        raise ValueError(f"checkpoint version {header['version']} is not supported")
+
+    simulation = Simulation(tuple(header['screenDimensions']), preyCount=0, predCount=0, workers=workers, profiler=profiler)
+    simulation.ticks = header['ticks']
+    simulation.totalKills = header.get('totalKills', 0)
+    simulation.preyReproductionInterval = header['preyReproductionInterval']
+    simulation.maxPreys = header['maxPreys']
+    world, dims = simulation.world, simulation.screenDimensions
+
+    offsets = arrays['genomeOffsets']
+    genomes = [_network.Genome(arrays['genomes'][lo:hi].copy()) for lo, hi in zip(offsets[:-1], offsets[1:])]
+    n = len(arrays['world_type'])
+    creatures = []
+    for idx in range(len(arrays['genomeOf'])):
+        detached = idx >= n
+        source = 'detached_' if detached else 'world_'
+        row = idx - n if detached else idx
+        species = _creatures.Prey if arrays[source + 'type'][row] == _world.PREY else _creatures.Predator
+        brain = _network.build(header['topologies'][arrays['topologyOf'][idx]], genomes[arrays['genomeOf'][idx]])
+        creature = species(0, 0, dims, _world.World(dims, 1, simulation.streams) if detached else world, brain)
+        for name in _world.fields:
+            if source + name in arrays: # -> older checkpoints lack the heading and memory fields
+                getattr(creature.world, name)[creature.index] = arrays[source + name][row]
+        creature.world.heading[creature.index] = _world.headingVectors(creature.world.angle[creature.index])
+        creature.selected = bool(arrays['selected'][idx])
+        creature.remoteControlled = bool(arrays['remoteControlled'][idx])
+        creature.intersects = arrays['intersects'][idx].tolist()
+        if 'serials' in arrays: # -> older checkpoints renumber the creatures in the same order
+            creature.serial = int(arrays['serials'][idx])
+        creatures.append(creature)
+    simulation.bestPreyPerformer, simulation.bestPredPerformer = [creatures[idx] for idx in header['best']]
+    world.serials = header.get('serials', world.serials)
+    simulation.grid.build(world.pos[:world.count])
+
+    # -> generators last, building the creatures above must not consume from them
+    simulation.streams.restore(header['streams'])
+    simulation.archive = archive
+    if archive is not None:
+        archive.rng = simulation.streams.archive
+        if header['archive'] is not None:
+            archive.rollback(header['archive']['count'])
+    return simulation
+
+# Periodic checkpoints written by a background thread
+# -> update(simulation) after every tick takes a snapshot every `every` ticks and hands it to the
+# -> writer, if the previous write is still going the snapshot waits for the next tick instead of blocking
+class Checkpointer:
+    def __init__(self, path, every=3600):
+        self.path = path
+        self.every = every
+        self.thread = None
+        self.due = False
+
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def update(self, simulation):
+        if simulation.ticks % self.every == 0:
+            self.due = True
+        if self.due and not self.busy():
+            self.due = False
+            self.thread = threading.Thread(target=write, args=(snapshot(simulation), self.path), daemon=True)
+            self.thread.start()
+
+    def close(self, simulation):
+        # -> waits for any write in flight, then saves the final state
+        if self.thread is not None:
+            self.thread.join()
+        save(simulation, self.path)
@@ -0,0 +1,36 @@
+import numpy as np
+from sensor import rectArray
+from world import PREY, PREDATOR
+
+# -> rect overlap test for parallel (x, y, w, h) arrays, same rules as Rect.colliderect
+def overlaps(a, b):
+    return ((a[:, 0] < b[:, 0] + b[:, 2]) & (a[:, 0] + a[:, 2] > b[:, 0]) &
+            (a[:, 1] < b[:, 1] + b[:, 3]) & (a[:, 1] + a[:, 3] > b[:, 1]))
+
+# -> every kill this tick as parallel (predators, preys) world index arrays, sorted by prey
+# -> broad phase: the grid from the end of the last tick, so the reach covers the rect overlap
+# -> plus one move. narrow phase: one vectorized rect test over all candidate pairs
+# -> a prey is only ever killed once, by the closest overlapping predator, lowest index on a tie
+# -> count leaves out creatures added after the grid was built
+def killPairs(world, grid, count=None):
+    n = world.count if count is None else count
+    pos, size, types, dead = world.pos[:n], world.size[:n], world.type[:n], world.dead[:n]
+    preys = np.nonzero((types == PREY) & ~dead)[0]
+    reach = size[preys] + world.topSpeed[:n][preys] + 1
+    queries, members = grid.pairs(pos[preys], reach)
+    preys = preys[queries]
+    candidate = (types[members] == PREDATOR) & ~dead[members]
+    preys, predators = preys[candidate], members[candidate]
+    if not len(preys):
+        return predators, preys
+
+    rects = rectArray(pos, size)
+    hit = overlaps(rects[preys], rects[predators])
+    preys, predators = preys[hit], predators[hit]
+
+    distance = ((pos[preys] - pos[predators]) ** 2).sum(axis=1)
+    order = np.lexsort((predators, distance, preys))
+    preys, predators = preys[order], predators[order]
+    first = np.ones(len(preys), dtype=bool)
+    first[1:] = preys[1:] != preys[:-1]
+    return predators[first], preys[first]
@@ -1,23 +1,55 @@
 # -> imports
 import pygame
-import random
 import network
+import render
+import brains
+from mutation import Mutator
 from sensor import Sensor
+from world import World, worldField, angleField, PREY, PREDATOR
 import math
 import numpy as np
-import time
 from pygame.locals import *
 
 
+# -> how far each species can see, also sizes the spatial hash cells
+preySensorLength = 80
+predatorSensorLength = 200
+
+# -> brain every new creature of each species is built with, creatures bred from others keep their parent's
+preyLayout = brains.Layout()
+predatorLayout = brains.Layout()
+
+# -> shared mutation operator, creatures mutate with their world's mutation stream
+mutator = Mutator()
+
 # -> convert degrees to radians
 def convAngle(angle):
     return (angle + -45) * (math.pi / 180)
 
-# Creature primative
+# Creature primative, a light view onto its slot in a World
 class Creature:
-    def __init__(self, x, y, screenDimensions):
+    # -> state kept in the World arrays
+    angle = angleField()
+    speed = worldField('speed')
+    energy = worldField('energy')
+    maxEnergy = worldField('maxEnergy')
+    lifetime = worldField('lifetime')
+    kills = worldField('kills')
+    reproduceTimer = worldField('reproduceTimer')
+    reproduceKills = worldField('reproduceKills')
+    dead = worldField('dead')
+    size = worldField('size')
+    topSpeed = worldField('topSpeed')
+    topAngle = worldField('topAngle')
+
+    def __init__(self, x, y, screenDimensions, world=None, brain=None):
         # -> basic setup
         self.screenDimensions = screenDimensions
+        self.world = world if world is not None else World(screenDimensions, capacity=1)
+        self.index = self.world.add(self)
+        self.world.type[self.index] = PREY if self.type == 'PREY' else PREDATOR
+        self.world.fov[self.index] = self.fov
+        self.world.rayLength[self.index] = self.sensor.rayLength
         self.lifetime = 0
         self.maxEnergy = 100
         self.dead = False
@@ -25,23 +57,34 @@ class Creature:
         self.topSpeed = 4
         self.topAngle = 40
         self.speed = 0
-        self.pos = pygame.math.Vector2(x, y)
+        self.pos = (x, y)
         self.size = 15
-        self.image = pygame.Surface((self.size, self.size))
-        self.rect = self.image.get_rect(center=(self.pos.x, self.pos.y))
-        self.angle = random.randint(0, 360)
+        self.angle = self.world.streams.spawn.integers(0, 360, endpoint=True)
         self.intersects = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        self.seen = None # -> the input row the network last thought with, for the sidebar
 
-        # -> neural network set up
-        self.network = network.Network()
-        self.network.add(network.FCLayer(10, 6))
-        self.network.add(network.FCLayer(6, 4))
-        self.network.add(network.FCLayer(4, 2))
-        self.network.add(network.ActivationLayer(network.sigmoid))
+        # -> neural network set up, children pass in a clone of their parent's
+        if brain is None:
+            brain = (preyLayout if self.type == 'PREY' else predatorLayout).build(self.world.streams.brains)
+        self.network = brain
 
         # -> misc 
         self.selected = False
         self.remoteControlled = False
+
+    @property
+    def pos(self):
+        return pygame.math.Vector2(self.world.pos[self.index].tolist())
+
+    @pos.setter
+    def pos(self, value):
+        self.world.pos[self.index] = value
+
+    @property
+    def rect(self):
+        rect = pygame.Rect(0, 0, self.size, self.size)
+        rect.center = self.world.pos[self.index].tolist()
+        return rect
     
     # -> move function for remote controlled creatures
     def move(self):
@@ -60,224 +103,221 @@ class Creature:
         if self.selected: # -> only draw rays if the creature is selected
             for ray in self.sensor.rays:
                 pygame.draw.line(win, ray[2], ray[0], ray[1], 2)
-        pygame.draw.circle(win, self.colour, self.rect.center, self.size / 2)
+        render.creatureAtlas(self.colour, self.size).blit(win, 'body', self.rect.center)
     
-    # -> returns instructions from the neural network
-    def parseNetwork(self, intersects):
-        angularChange, speed = self.network.predict([np.array(intersects)])[0]
-        angularChange = (0 - (0.5 - angularChange) * 2) * self.topAngle
-        speed = self.topSpeed * speed
-        return angularChange, speed
-    
-    # -> clamp the creature into the screen
-    def clampInScreen(self):
-        if self.pos.x < 0:
-            self.pos.x = self.screenDimensions[0] - 1 # - self.size
-        elif self.pos.x > self.screenDimensions[0]:
-            self.pos.x = 0
-        if self.pos.y < 0:
-            self.pos.y = self.screenDimensions[1]
-        elif self.pos.y > self.screenDimensions[1]:
-            self.pos.y = 0
-
-    def clone(self, mutate=True):
+    # -> the network's input row, intersects in the order the network sees them and everything else from the world
+    def networkInput(self, intersects, grid=None):
+        return brains.inputs(self.network.inputs, self.network.memory, brains.state(self.world), np.array([intersects], dtype=float), [self.index], grid)
+
+    # -> brain replaces this creature's network in the clone, for respawning from the archive
+    def clone(self, mutate=True, world=None, brain=None):
+        world = world if world is not None else self.world
+        brain = brain if brain is not None else self.network.clone()
+        x, y = world.streams.spawn.integers(1, 600, endpoint=True, size=2).tolist()
         if self.type == "PREY":
-            clone = Prey(random.randint(1, 600), random.randint(1, 600), self.screenDimensions)
+            clone = Prey(x, y, self.screenDimensions, world, brain)
         else:
-            clone = Predator(random.randint(1, 600), random.randint(1, 600), self.screenDimensions)
-        clone.network = self.network
+            clone = Predator(x, y, self.screenDimensions, world, brain)
         if mutate:return self.mutate(clone)
         return clone
 
     def mutate(self, child):
-        childNetwork = child.network
-        for layer in [layer for layer in childNetwork.layers if not(isinstance(layer, network.ActivationLayer))]:
-            if random.random() < 0.6:
-                print('mutating weights')
-                # -> mutating weights
-                for weights in layer.weights:
-                    for idx, weight in enumerate(weights):
-                        if random.random() < 0.02:
-                            layer.weights[idx] = weight + random.random() - 0.5
-                        if random.random() < 0.02:
-                            layer.weights[idx] *= -1
-                        if random.random() < 0.02:
-                            layer.bias[0][idx] = random.random() - 0.5
-            if random.random() < 0.6:
-                print('mutating biases')
-                # -> mutating biases
-                for idx, bias in enumerate(layer.bias[0]):
-                    if random.random() < 0.02:
-                        layer.bias[0][idx] + random.random() - 0.5
-                    if random.random() < 0.02:
-                        layer.bias[0][idx] = random.random() - 0.5
-                    if random.random() < 0.02:
-                        layer.bias[0][idx] *= -1
+        mutator.mutateNetwork(child.network, child.world.streams.mutation)
         return child
         
 
 class Prey(Creature):
-    def __init__(self, x, y, screenDimensions):
+    def __init__(self, x, y, screenDimensions, world=None, brain=None):
         self.fov = math.pi * 2
-        self.reproduceTimer = 0
-        self.sensor = Sensor(self, 80)
+        self.sensor = Sensor(self, preySensorLength)
         self.colour = (252, 186, 3)
         self.type = "PREY"
-        super().__init__(x, y, screenDimensions)
-        self.image.fill((0, 255, 0))
-    
-    def update(self, creatures):
-        if not self.selected:self.remoteControlled = False
-        self.intersects = self.sensor.update(creatures)
-        self.intersects.reverse()
-        if not self.remoteControlled:
-            # -> getting movement from neural network
-            angularChange, speed = self.parseNetwork(self.intersects)
-            self.angle += angularChange
-            self.speed = speed if self.energy - (0.25 * speed) > 0 else 0
-        else:
-            self.move() # -> player control
-            self.speed = self.speed if self.energy > 0 else 0
-
-        if self.speed == 0: # -> when creature is idle, give it dose of energy
-            self.energy += 0.25 if self.energy < self.maxEnergy else 0
-        elif self.energy - 0.25 * self.speed > 0: # -> has energy and wants to move
-            radians = math.radians(self.angle)
-            self.pos.x -= math.sin(radians) * self.speed
-            self.pos.y -= math.cos(radians) * self.speed
-            self.energy -= 0.2 * self.speed
-            self.clampInScreen()
-            self.rect.center = self.pos
+        super().__init__(x, y, screenDimensions, world, brain)
+        self.reproduceTimer = 0
     
-    def reproduce(self):
-        child = Prey(self.rect.centerx + random.randint(-20, 20), self.rect.centery + random.randint(-20, 20), self.screenDimensions)
-        child.network = self.network
-        return self.mutate(child) if random.random() < 0.5 else child
+    # -> offset: where the child lands from the parent, roll: uniform draw in [0, 1) deciding whether it mutates
+    def reproduce(self, offset, roll):
+        child = Prey(self.rect.centerx + offset[0], self.rect.centery + offset[1], self.screenDimensions, self.world, self.network.clone())
+        return self.mutate(child) if roll < 0.5 else child
 
 class Predator(Creature):
-    def __init__(self, x, y, screenDimensions):
+    killsToReproduce = 3
+
+    def __init__(self, x, y, screenDimensions, world=None, brain=None):
         self.type = "PREDATOR"
+        self.fov = math.pi / 5
+        self.sensor = Sensor(self, predatorSensorLength)
+        self.colour = (179, 18, 77)
+        super().__init__(x, y, screenDimensions, world, brain)
         self.kills = 0
         self.reproduceKills = 0
-        self.killsToReproduce = 3
-        self.fov = math.pi / 5
-        self.sensor = Sensor(self, 200)
         self.energy = 100
-        self.colour = (179, 18, 77)
-        super().__init__(x, y, screenDimensions)
-        self.image.fill((150, 0, 0))
-    
-    def update(self, creatures):
-        if not self.selected:self.remoteControlled = False
-        start = time.perf_counter_ns()
-        self.intersects = self.sensor.update(creatures)
-        # print('Sensor Update Took:', str(time.perf_counter_ns() - start))
-        self.intersects.reverse()
-        if self.energy <= 0:
-            self.selected = False
-            self.remoteControlled = False
-            self.dead = True
-            return
-
-        if not self.remoteControlled:
-            # -> get instructions from the neural network
-            start = time.perf_counter_ns()
-            angularChange, self.speed = self.parseNetwork(self.intersects)
-            # print('Network Took:', str(time.perf_counter_ns() - start))
-            self.angle += angularChange
-        else:
-            self.move()
-
-        self.radians = math.radians(self.angle)
-        self.pos.x -= math.sin(self.radians) * self.speed
-        self.pos.y -= math.cos(self.radians) * self.speed
-        self.clampInScreen()
-        self.rect.center = self.pos
-        self.energy -= max(self.speed * 0.2, 0.05) # -> energy usage must be at least 0.2 so they dont live forever
-
-    def reproduce(self):
-        child = Predator(self.rect.centerx + random.randint(-20, 20), self.rect.centery + random.randint(-20, 20), self.screenDimensions)
-        child.network = self.network # -> copy network over
+
+    def reproduce(self, offset, roll=None):
+        child = Predator(self.rect.centerx + offset[0], self.rect.centery + offset[1], self.screenDimensions, self.world, self.network.clone()) # -> shares the genome until mutated
         return child
 
 
 
-# -> Function that gets infomation from a selected creature and creates a sidebar object
-# -> that can be drawn to the screen
+# -> network outputs to (angularChange, speed), the turn is centred on 0.5 and scaled by topAngle, the speed by topSpeed
+def steering(outputs, topAngle, topSpeed):
+    outputs = np.asarray(outputs, dtype=float) # -> float32 network outputs, scaled in float64
+    angularChange = (0 - (0.5 - outputs[:, 0]) * 2) * topAngle
+    speed = topSpeed * outputs[:, 1]
+    return angularChange, speed
+
+# -> steering of every creature in a world, the networks run in one batched pass per brain signature
+# -> unless their outputs were already worked out elsewhere (one signature, memory outputs not yet stored), grid is the one sensing used
+def thinkAll(world, intersects, grid=None, outputs=None):
+    if not world.count:
+        return
+    for creature, sensed in zip(world.creatures, intersects):
+        if not creature.selected:creature.remoteControlled = False
+        creature.intersects = sensed
+        creature.intersects.reverse()
+        if creature.selected: # -> what the sidebar traces, taken before the memory outputs overwrite the inputs
+            creature.seen = creature.networkInput(creature.intersects, grid)[0]
+    n = world.count
+    if outputs is None:
+        outputs = brains.think(world, np.array([creature.intersects for creature in world.creatures], dtype=float), grid)
+    else:
+        brains.remember(world, slice(0, n), outputs, world.creatures[0].network.memory)
+    world.turn[:n], world.throttle[:n] = steering(outputs, world.topAngle[:n], world.topSpeed[:n])
+    world.controlled[:n] = [creature.remoteControlled for creature in world.creatures]
+    for creature in world.creatures:
+        if creature.remoteControlled:
+            creature.move() # -> player control
+
+
 
 def getFontObject(msg, fontSize=24, colour=(0, 0, 0)):
-    # -> pygame wrapper to speed up text creation
-    font = pygame.font.SysFont('Consolas', fontSize)
-    fontSurface = font.render(msg, True, colour)
-    return fontSurface
-
-def generateCreatureSidebar(creature, winDimensions, clicked, mousePos):
-    # -> returns a sidebar surface for infomation on creatures
-    sidebarSize = (winDimensions[0] * 0.3, winDimensions[1])
-    surface = pygame.Surface(sidebarSize, pygame.SRCALPHA)
-    surface.fill((98, 114, 164, 200))
-
-    # -> drawing the side bar title
-    fontObject = getFontObject(creature.type, fontSize=36, colour=(189, 147, 249))
-    surface.blit(fontObject, (sidebarSize[0] * 0.5 - fontObject.get_width() / 2, sidebarSize[1] * 0.01))
-
-    if creature.type == 'PREDATOR': # -> display kills if creature is a predator
-        surface.blit(getFontObject('Kills: '+str(creature.kills), colour=(189, 147, 249)), (0, sidebarSize[1] * 0.1))
-
-    # -> drawing lifetime
-    surface.blit(getFontObject('Lifetime: '+str(creature.lifetime), colour=(189, 147, 249)), (0, sidebarSize[1] * 0.15))
-
-    # -> drawing the energy progress bar
-    surface.blit(getFontObject('Energy:', colour=(189, 147, 249)), (0, sidebarSize[1] * 0.2))
-    progressBarPos = (sidebarSize[0] * 0.1, sidebarSize[1] * 0.25)
-    progressBarLength = sidebarSize[0] * 0.8
-    pygame.draw.rect(surface, (68, 71, 90), (progressBarPos[0], progressBarPos[1], progressBarLength, sidebarSize[1] * 0.05))
-    pygame.draw.rect(surface, (80, 250, 123), (progressBarPos[0], progressBarPos[1], progressBarLength * (creature.energy / creature.maxEnergy), sidebarSize[1] * 0.05))
-
-    # -> drawing the speed progress bar
-    surface.blit(getFontObject('Speed:', colour=(189, 147, 249)), (0, sidebarSize[1] * 0.35))
-    progressBarPos = (sidebarSize[0] * 0.1, sidebarSize[1] * 0.4)
-    progressBarLength = sidebarSize[0] * 0.8
-    pygame.draw.rect(surface, (68, 71, 90), (progressBarPos[0], progressBarPos[1], progressBarLength, sidebarSize[1] * 0.05))
-    pygame.draw.rect(surface, (80, 250, 123), (progressBarPos[0], progressBarPos[1], progressBarLength * (creature.speed / creature.topSpeed), sidebarSize[1] * 0.05))
-
-    # -> drawing realtime neural network visualizer
-    surface.blit(getFontObject('Network:', colour=(189, 147, 249)), (0, sidebarSize[1] * 0.5))
-    intersects = creature.intersects
-    intersects.reverse()
-    connectionLength = sidebarSize[0] * 0.6
-    lenBetweenNeuron = sidebarSize[0] // len(intersects)
-    pos = (sidebarSize[0] * 0.2, winDimensions[1] * 0.55)
-    topNeuronPos = (sidebarSize[0] * 0.8, pos[1] + (lenBetweenNeuron * len(intersects) * 0.5 - (lenBetweenNeuron * 0.5)))
-    bottomNeuronPos = (sidebarSize[0] * 0.8, pos[1] + (lenBetweenNeuron * len(intersects) * 0.5 + (lenBetweenNeuron * 0.5)))
-    line1TotalAlpha = 0
-    line2TotalAlpha = 0
-    for yMove in range(len(intersects)):
-        pygame.draw.circle(surface, (255, 121, 198, (intersects[yMove] * 255)), (pos[0], pos[1] + yMove * lenBetweenNeuron), 5)
-        line1Alpha = (intersects[yMove] * 255)
-        line2Alpha = (intersects[yMove] * 255)
-        pygame.draw.line(surface, (139, 233, 253, line1Alpha), (pos[0], pos[1] + yMove * lenBetweenNeuron), topNeuronPos, 2)
-        pygame.draw.line(surface, (139, 233, 253, line2Alpha), (pos[0], pos[1] + yMove * lenBetweenNeuron), bottomNeuronPos, 2)
-        line1TotalAlpha += line1Alpha
-        line2TotalAlpha += line2Alpha
-    
-    pygame.draw.circle(surface, (255, 121, 198, (line1TotalAlpha / (len(intersects) * 255) * 255)), topNeuronPos, 7)
-    pygame.draw.circle(surface, (255, 121, 198, (line2TotalAlpha / (len(intersects) * 255) * 255)), bottomNeuronPos, 7)
+    # -> pygame wrapper to speed up text creation, fonts and rendered text come from the render caches
+    return render.text(msg, fontSize, tuple(colour))
 
-    # -> handling the remote control feature
-    surface.blit(getFontObject('Control:', colour=(189, 147, 249)), (0, sidebarSize[1] * 0.95))
-    pygame.draw.rect(surface, (68, 71, 90), 
-    (sidebarSize[0] * 0.5, sidebarSize[1] * 0.95, sidebarSize[0] * 0.4, sidebarSize[1] * 0.04))
-    
-    if not creature.remoteControlled:
-        rect = pygame.Rect(sidebarSize[0] * 0.5, sidebarSize[1] * 0.95, sidebarSize[0] * 0.4 * 0.5, sidebarSize[1] * 0.04)
-        pygame.draw.rect(surface, (255, 85, 85), rect)
-        if clicked and rect.collidepoint(mousePos):
-            creature.remoteControlled = True
-    else:
-        rect = pygame.Rect(sidebarSize[0] * 0.5 + sidebarSize[0] * 0.4 * 0.5, sidebarSize[1] * 0.95, sidebarSize[0] * 0.4 * 0.5, sidebarSize[1] * 0.04)
-        pygame.draw.rect(surface, (80, 250, 123), rect)
-        if clicked and rect.collidepoint(mousePos):
-            creature.remoteControlled = False
+# Retained sidebar with infomation on the selected creature
+# -> the labels and bar backgrounds are drawn once per creature type, each frame only works out what every
+# -> dynamic region (text, each bar, the network, the control switch) would show and redraws the regions that changed,
+# -> a region is first restored from the static layer so nothing from the last frame blends into it
+class CreatureSidebar:
+    textColour = (189, 147, 249)
+    positive = (255, 121, 198)
+    negative = (139, 233, 253)
+
+    def __init__(self, winDimensions):
+        self.winDimensions = winDimensions
+        self.size = (winDimensions[0] * 0.3, winDimensions[1])
+        self.statics = {}
+        self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        self.shown = {} # -> region: what it shows now
+        self.type = None
+        width, height = self.size
+        self.energyBar = (width * 0.1, height * 0.25, width * 0.8, height * 0.05)
+        self.speedBar = (width * 0.1, height * 0.4, width * 0.8, height * 0.05)
+        self.controlRects = (pygame.Rect(width * 0.5, height * 0.95, width * 0.4 * 0.5, height * 0.04),
+                             pygame.Rect(width * 0.5 + width * 0.4 * 0.5, height * 0.95, width * 0.4 * 0.5, height * 0.04))
+        self.regions = {
+            'text': pygame.Rect(0, height * 0.1, width, height * 0.1),
+            'energy': pygame.Rect(self.energyBar),
+            'speed': pygame.Rect(self.speedBar),
+            'network': pygame.Rect(0, height * 0.55, width, height * 0.39),
+            'control': self.controlRects[0].union(self.controlRects[1]),
+        }
+
+    def static(self, creatureType):
+        # -> everything that never changes for a creature type
+        if creatureType not in self.statics:
+            width, height = self.size
+            surface = pygame.Surface(self.size, pygame.SRCALPHA)
+            surface.fill((98, 114, 164, 200))
+            title = getFontObject(creatureType, fontSize=36, colour=self.textColour)
+            surface.blit(title, (width * 0.5 - title.get_width() / 2, height * 0.01))
+            surface.blit(getFontObject('Energy:', colour=self.textColour), (0, height * 0.2))
+            surface.blit(getFontObject('Speed:', colour=self.textColour), (0, height * 0.35))
+            surface.blit(getFontObject('Network:', colour=self.textColour), (0, height * 0.5))
+            surface.blit(getFontObject('Control:', colour=self.textColour), (0, height * 0.95))
+            for bar in (self.energyBar, self.speedBar):
+                pygame.draw.rect(surface, (68, 71, 90), bar)
+            pygame.draw.rect(surface, (68, 71, 90), (width * 0.5, height * 0.95, width * 0.4, height * 0.04))
+            self.statics[creatureType] = surface
+        return self.statics[creatureType]
+
+    def layout(self, counts):
+        # -> neuron positions per layer, columns across the network area, each column centred
+        width, height = self.size
+        top, bottom = height * 0.56, height * 0.92
+        spacing = (bottom - top) / max(counts)
+        columns = np.linspace(width * 0.1, width * 0.9, len(counts))
+        return [[(x, (top + bottom) / 2 + (row - (count - 1) / 2) * spacing) for row in range(count)] for x, count in zip(columns, counts)]
+
+    def drawNetwork(self, creature, activations):
+        positions = self.layout([len(layer) for layer in activations])
+        weights = [layer.weights for layer in creature.network.layers if isinstance(layer, network.FCLayer)]
+        for layer, weight in enumerate(weights[:len(positions) - 1]):
+            # -> connection strength is what each input actually feeds into each neuron
+            flow = np.abs(activations[layer][:, None] * weight)
+            flow = (flow / flow.max() * 255).astype(int) if flow.max() > 0 else flow.astype(int)
+            for row, start in enumerate(positions[layer]):
+                for column, end in enumerate(positions[layer + 1]):
+                    pygame.draw.line(self.surface, self.negative + (int(flow[row, column]),), start, end, 1)
+        for layer, (values, centres) in enumerate(zip(activations, positions)):
+            scale = max(1, np.abs(values).max()) # -> hidden layers are unbounded, inputs and outputs sit in 0..1
+            for value, centre in zip(values.tolist(), centres):
+                colour = self.positive if value >= 0 else self.negative
+                pygame.draw.circle(self.surface, colour + (int(abs(value) / scale * 255),), centre, 5)
+
+    def draw(self, creature, clicked, mousePos):
+        # -> returns the sidebar surface for creature, also handles clicks on the remote control switch
+        if clicked and self.controlRects[0 if not creature.remoteControlled else 1].collidepoint(mousePos):
+            creature.remoteControlled = not creature.remoteControlled
+
+        # -> one column per fully connected layer, an activation layer replaces the column it squashes
+        seen = creature.seen if creature.seen is not None else creature.networkInput(creature.intersects)[0]
+        trace = network.trace(creature.network, seen)
+        activations = trace[:1]
+        for layer, output in zip(creature.network.layers, trace[1:]):
+            if isinstance(layer, network.FCLayer):
+                activations.append(output)
+            else:
+                activations[-1] = output
+        energy = int(self.energyBar[2] * (creature.energy / creature.maxEnergy))
+        speed = int(self.speedBar[2] * (creature.speed / creature.topSpeed))
+        shown = {
+            'text': (creature.kills, creature.lifetime),
+            'energy': energy,
+            'speed': speed,
+            'network': (id(creature.network), tuple(np.round(np.concatenate(activations), 3).tolist())),
+            'control': creature.remoteControlled,
+        }
+        if creature.type != self.type: # -> a new static layer, every region is redrawn on it
+            self.type = creature.type
+            self.shown = {}
+            self.surface.fill((0, 0, 0, 0))
+            self.surface.blit(self.static(creature.type), (0, 0))
+
+        width, height = self.size
+        for region, value in shown.items():
+            if self.shown.get(region) == value:
+                continue
+            self.shown[region] = value
+            self.restore(region)
+            if region == 'text':
+                if creature.type == 'PREDATOR': # -> display kills if creature is a predator
+                    self.surface.blit(getFontObject('Kills: '+str(creature.kills), colour=self.textColour), (0, height * 0.1))
+                self.surface.blit(getFontObject('Lifetime: '+str(creature.lifetime), colour=self.textColour), (0, height * 0.15))
+            elif region == 'energy':
+                pygame.draw.rect(self.surface, (80, 250, 123), (self.energyBar[0], self.energyBar[1], energy, self.energyBar[3]))
+            elif region == 'speed':
+                pygame.draw.rect(self.surface, (80, 250, 123), (self.speedBar[0], self.speedBar[1], speed, self.speedBar[3]))
+            elif region == 'network':
+                self.drawNetwork(creature, activations)
+            elif not creature.remoteControlled:
+                pygame.draw.rect(self.surface, (255, 85, 85), self.controlRects[0])
+            else:
+                pygame.draw.rect(self.surface, (80, 250, 123), self.controlRects[1])
+        return self.surface
 
-    return surface
\ No newline at end of file
+    def restore(self, region):
+        # -> puts back the static layer's pixels under a region, cleared first so the blit copies instead of blending
+        rect = self.regions[region]
+        self.surface.fill((0, 0, 0, 0), rect)
+        self.surface.blit(self.static(self.type), rect, rect)
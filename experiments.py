@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# -> runs many headless worlds over a parameter grid in parallel processes
+# -> python experiments.py --grid '{"killsToReproduce": [2, 3], "preySensorLength": [60, 80]}' --seeds 1 2 3
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # -> inherited by the worker processes
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from concurrent.futures import ProcessPoolExecutor
+import creatures as _creatures
+import brains as _brains
+import telemetry as _telemetry
+from simulation import Simulation
+import multiprocessing
+import itertools
+import signal
+import argparse
+import queue
+import json
+import time
+import sys
+
+# -> module level settings a run can change: parameter: (object, attribute)
+settings = {
+    'killsToReproduce': (_creatures.Predator, 'killsToReproduce'),
+    'preySensorLength': (_creatures, 'preySensorLength'),
+    'predatorSensorLength': (_creatures, 'predatorSensorLength'),
+    'layerChance': (_creatures.mutator, 'layerChance'),
+    'nudgeRate': (_creatures.mutator, 'nudgeRate'),
+    'nudgeSize': (_creatures.mutator, 'nudgeSize'),
+    'flipRate': (_creatures.mutator, 'flipRate'),
+    'resetRate': (_creatures.mutator, 'resetRate'),
+    'resetSize': (_creatures.mutator, 'resetSize'),
+    # -> json objects of brains.Layout arguments
+    'preyBrain': (_creatures, 'preyLayout'),
+    'predatorBrain': (_creatures, 'predatorLayout'),
+}
+# -> settings that live on the Simulation or are passed to it
+simulationSettings = ['preyReproductionInterval', 'maxPreys']
+constructorSettings = ['preyCount', 'predCount']
+defaults = {name: getattr(owner, attribute) for name, (owner, attribute) in settings.items()}
+
+def configure(params):
+    # -> worker processes are reused between runs, so every setting is reset before a run
+    for name, (owner, attribute) in settings.items():
+        value = params.get(name, defaults[name])
+        setattr(owner, attribute, _brains.Layout(**value) if isinstance(value, dict) else value)
+
+# -> every combination of the grid's values, each paired with every seed
+def expand(grid, seeds):
+    unknown = set(grid) - set(settings) - set(simulationSettings) - set(constructorSettings)
+    if unknown:
+        raise ValueError('unknown parameters: ' + ', '.join(sorted(unknown)))
+    names = sorted(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    return [(params, seed) for params in combinations for seed in seeds]
+
+# -> result queue and cancel flag, handed to every worker process by the pool initializer
+results = cancel = None
+
+def startWorker(resultQueue, cancelEvent):
+    global results, cancel
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # -> ctrl-c reaches every process, only the main one handles it
+    results, cancel = resultQueue, cancelEvent
+
+# -> worker side, one world from start to finish, every `every` ticks a record goes to the results queue and a run record ends it
+def runExperiment(run, params, seed, ticks, every):
+    configure(params)
+    counts = {name: params[name] for name in constructorSettings if name in params}
+    simulation = Simulation(seed=seed, **counts)
+    for name in simulationSettings:
+        if name in params:
+            setattr(simulation, name, params[name])
+    last = _telemetry.totals(simulation)
+    start = time.perf_counter()
+    cancelled = False
+    while simulation.ticks < ticks:
+        if cancel.is_set():
+            cancelled = True
+            break
+        for _ in range(min(every, ticks - simulation.ticks)):
+            simulation.step()
+        record = _telemetry.statistics(simulation, last)
+        record.update(type='generation', run=run, seed=seed, params=params)
+        results.put(record)
+    simulation.close()
+    # -> the run record goes last through the same queue, so once it arrives every generation record before it has too
+    results.put({'type': 'run', 'run': run, 'seed': seed, 'params': params, 'ticks': simulation.ticks,
+                 'seconds': round(time.perf_counter() - start, 3), 'cancelled': cancelled})
+
+# -> main side, streams every record into output as json lines as soon as it arrives
+# -> it drains the queue until every run's record has arrived, Queue.empty() can miss records still being sent
+# -> ctrl-c drops the runs that have not started and stops running ones after their current generation
+def runGrid(grid, seeds, ticks, every, workers, output):
+    runs = expand(grid, seeds)
+    generations = len(runs) * -(-ticks // every)
+    context = multiprocessing.get_context('spawn')
+    resultQueue, cancelEvent = context.Queue(), context.Event()
+    executor = ProcessPoolExecutor(workers, mp_context=context, initializer=startWorker, initargs=(resultQueue, cancelEvent))
+    futures = [executor.submit(runExperiment, run, params, seed, ticks, every) for run, (params, seed) in enumerate(runs)]
+    received = finished = 0
+    progress = None
+    with open(output, 'w') as file:
+        pending = set(range(len(runs))) # -> runs whose run record has not arrived
+        while pending:
+            try:
+                try:
+                    record = resultQueue.get(timeout=0.2)
+                    file.write(json.dumps(record) + '\n')
+                    file.flush()
+                    if record['type'] == 'run':
+                        pending.discard(record['run'])
+                        finished += 1
+                    else:
+                        received += 1
+                except queue.Empty:
+                    pass
+                for run in [run for run in pending if futures[run].done()]:
+                    if futures[run].cancelled(): # -> never started, so it sends nothing
+                        pending.discard(run)
+                    elif futures[run].exception() is not None:
+                        futures[run].result()
+                if progress != (received, finished):
+                    progress = (received, finished)
+                    print(f'\rgenerations {received}/{generations}  runs {finished}/{len(runs)}', end='', flush=True)
+            except KeyboardInterrupt:
+                if not cancelEvent.is_set():
+                    print('\ncancelling, waiting for running worlds to finish their generation')
+                    cancelEvent.set()
+                    for future in futures:
+                        future.cancel()
+    executor.shutdown()
+    print()
+    return received
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Batch evolution runs over a parameter grid')
+    parser.add_argument('--grid', default='{}', help='json object (or a path to one) of parameter: [values], parameters: '
+                        + ', '.join(list(settings) + simulationSettings + constructorSettings))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1], help='seeds every combination runs with')
+    parser.add_argument('--ticks', type=int, default=60000, help='ticks per run')
+    parser.add_argument('--every', type=int, default=600, help='ticks per generation record')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to every core')
+    parser.add_argument('--output', default='experiments.jsonl', help='json lines file the records stream into')
+    args = parser.parse_args()
+
+    grid = json.load(open(args.grid)) if os.path.exists(args.grid) else json.loads(args.grid)
+    runGrid(grid, args.seeds, args.ticks, args.every, args.workers, args.output)
+    print('Results written to', args.output)
+    sys.exit()
@@ -0,0 +1,114 @@
+# -> imports
+from world import PREY, PREDATOR
+import heapq
+
+# -> a fitness function maps a creature's kills to (slope, offset), its fitness is slope * lifetime + offset
+# -> lifetime is the only thing that changes every tick, so between kills every creature's fitness
+# -> is a straight line and creatures on the same line keep their order as time passes
+def lifetimeFitness(kills):
+    return 1, 0
+
+def killLifetimeFitness(kills):
+    return kills, 0
+
+def killFitness(kills):
+    return 0, kills
+
+# -> what bestPreyPerformer and bestPredPerformer have always been picked by
+defaultFitness = {PREY: lifetimeFitness, PREDATOR: killLifetimeFitness}
+
+def speciesOf(creature):
+    return PREY if creature.type == 'PREY' else PREDATOR
+
+# Event driven ranking of every creature in a World by fitness, per species
+# -> creatures are grouped by their (slope, offset) line and each group is a heap ordered by where the
+# -> creature's line sits, which never changes while it ages. births are picked up from the world, kills
+# -> and deaths are reported with rekey() and remove(), and best() only looks at the top of each group
+# -> ties go to the creature added to the world last, the same one a scan in world order with >= picks
+class FitnessTracker:
+    def __init__(self, world, fitness=None):
+        self.world = world
+        self.fitness = dict(defaultFitness) if fitness is None else fitness
+        self.entries = {} # -> serial: (creature, group, version)
+        self.heaps = {PREY: {}, PREDATOR: {}} # -> group: heap of (-slope * intercept, -serial, serial, version)
+        self.sizes = {PREY: {}, PREDATOR: {}}
+        self.nextSerial = 0
+        self.version = 0
+
+    def value(self, creature):
+        slope, offset = self.fitness[speciesOf(creature)](creature.kills)
+        return slope * creature.lifetime + offset
+
+    def insert(self, creature):
+        species = speciesOf(creature)
+        slope, offset = group = self.fitness[species](creature.kills)
+        intercept = creature.lifetime - self.world.ages # -> lifetime = world.ages + intercept from now on
+        self.version += 1
+        heap = self.heaps[species].setdefault(group, [])
+        heapq.heappush(heap, (-slope * intercept, -creature.serial, creature.serial, self.version))
+        self.entries[creature.serial] = (creature, group, self.version)
+        self.sizes[species][group] = self.sizes[species].get(group, 0) + 1
+        if len(heap) > 2 * self.sizes[species][group] + 32: # -> drop the stale entries left by kills and deaths
+            heap[:] = [item for item in heap if self.entries.get(item[2], (None, None, None))[2] == item[3]]
+            heapq.heapify(heap)
+
+    def discard(self, creature):
+        _, group, _ = self.entries.pop(creature.serial)
+        species = speciesOf(creature)
+        self.sizes[species][group] -= 1
+        if not self.sizes[species][group]: # -> empty groups go, so best() only visits lines someone is on
+            del self.sizes[species][group]
+            del self.heaps[species][group]
+
+    def sync(self):
+        # -> births, everything the world added since the last sync sits at the end of its creature list
+        creatures = self.world.creatures
+        first = len(creatures)
+        while first and creatures[first - 1].serial >= self.nextSerial:
+            first -= 1
+        for creature in creatures[first:]:
+            self.insert(creature)
+        self.nextSerial = self.world.serials
+
+    def rekey(self, creatures):
+        # -> creatures whose kills changed move to their new group
+        self.sync()
+        for creature in creatures:
+            if creature.serial in self.entries:
+                self.discard(creature)
+                self.insert(creature)
+
+    def remove(self, creatures):
+        # -> deaths, call with the creatures World.removeDead returns
+        for creature in creatures:
+            if creature.serial in self.entries and self.entries[creature.serial][0] is creature:
+                self.discard(creature)
+
+    def best(self, species):
+        # -> (fitness, creature) of the fittest creature not under remote control, or None
+        self.sync()
+        result = None
+        for group, heap in self.heaps[species].items():
+            held = []
+            while heap:
+                _, _, serial, version = heap[0]
+                creature, _, current = self.entries.get(serial, (None, None, None))
+                if current != version:
+                    heapq.heappop(heap) # -> stale, the creature died or moved group
+                elif creature.remoteControlled:
+                    held.append(heapq.heappop(heap))
+                else:
+                    value = self.value(creature)
+                    if result is None or (value, serial) > (result[0], result[1].serial):
+                        result = (value, creature)
+                    break
+            for item in held:
+                heapq.heappush(heap, item)
+        return result
+
+    def select(self, species, current):
+        # -> the best performer after this tick, current stays unless someone matches or beats it
+        best = self.best(species)
+        if best is not None and best[0] >= self.value(current):
+            return best[1]
+        return current
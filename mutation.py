@@ -0,0 +1,68 @@
+import numpy as np
+import network
+
+# Mask based mutation operator, works on whole arrays in place with preallocated scratch buffers
+# -> every layer has layerChance of being touched, then each value independently can be
+# -> nudged by up to +-nudgeSize, have its sign flipped, or (biases only) be reset to +-resetSize
+# -> draws come from rng when one is passed, so every world can mutate from its own stream
+class Mutator:
+    def __init__(self, layerChance=0.6, nudgeRate=0.02, nudgeSize=0.5, flipRate=0.02, resetRate=0.02, resetSize=0.5, rng=None):
+        self.layerChance = layerChance
+        self.nudgeRate = nudgeRate
+        self.nudgeSize = nudgeSize
+        self.flipRate = flipRate
+        self.resetRate = resetRate
+        self.resetSize = resetSize
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.buffers = {}
+
+    def scratch(self, shape, dtype):
+        # -> draw, noise and mask buffers reused for every array of this shape
+        key = (shape, np.dtype(dtype).str)
+        if key not in self.buffers:
+            self.buffers[key] = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype), np.empty(shape, dtype=bool))
+        return self.buffers[key]
+
+    def uniform(self, out, size, rng):
+        # -> fills out with uniform values in [-size, size) without allocating
+        rng.random(out=out, dtype=out.dtype)
+        out -= 0.5
+        out *= 2 * size
+
+    def chance(self, out, mask, rate, gate, rng):
+        rng.random(out=out, dtype=out.dtype)
+        np.less(out, rate, out=mask)
+        if gate is not None:
+            mask &= gate
+
+    def mutateArray(self, array, reset=False, gate=None, rng=None):
+        # -> mutates array in place, gate is an optional mask broadcast over it
+        rng = rng if rng is not None else self.rng
+        draw, noise, mask = self.scratch(array.shape, array.dtype)
+        self.chance(draw, mask, self.nudgeRate, gate, rng)
+        self.uniform(noise, self.nudgeSize, rng)
+        np.add(array, noise, out=array, where=mask)
+        if reset:
+            self.chance(draw, mask, self.resetRate, gate, rng)
+            self.uniform(noise, self.resetSize, rng)
+            np.copyto(array, noise, where=mask)
+        self.chance(draw, mask, self.flipRate, gate, rng)
+        np.negative(array, out=array, where=mask)
+        return array
+
+    def mutateStacked(self, array, reset=False, rng=None):
+        # -> one layer of a whole population stacked on the first axis, each network rolls its own layer chance
+        rng = rng if rng is not None else self.rng
+        gate = rng.random(len(array)) < self.layerChance
+        return self.mutateArray(array, reset, gate.reshape((-1,) + (1,) * (array.ndim - 1)), rng)
+
+    def mutateNetwork(self, net, rng=None):
+        rng = rng if rng is not None else self.rng
+        net.makeUnique() # -> copy on write, never touch a genome another network shares
+        for layer in net.layers:
+            if isinstance(layer, network.FCLayer):
+                if rng.random() < self.layerChance:
+                    self.mutateArray(layer.weights, rng=rng)
+                if rng.random() < self.layerChance:
+                    self.mutateArray(layer.bias, reset=True, rng=rng)
+        return net
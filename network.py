@@ -1,38 +1,52 @@
 import numpy as np
-import math
-import random
+import weakref
 
-def sigmoid(x):
-    y = 1 / (1 + math.e ** -x)
-    return y
+# activations, out=x works in place and float32 input stays float32
+# 0.5 * (1 + tanh(x / 2)) is the logistic function without the overflow of e ** -x for large negative x
+def sigmoid(x, out=None):
+    out = np.multiply(x, 0.5, out=out)
+    np.tanh(out, out=out)
+    out += 1
+    out *= 0.5
+    return out
 
-def softmax(x):
-    e = np.exp(x)
-    return e / e.sum()
+def tanh(x, out=None):
+    return np.tanh(x, out=out)
+
+def relu(x, out=None):
+    return np.maximum(x, 0, out=out)
+
+# over the last axis, the row maximum is subtracted first so exp never overflows
+def softmax(x, out=None):
+    out = np.subtract(x, np.max(x, axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=-1, keepdims=True)
+    return out
+
+# input names of the original brain, the ten sensor rays
+defaultInputs = ('rays',)
 
 # Base Class
 class Layer:
-    def __init__(self):
-        self.input = None
-        self.output = None
-    
-    # computes the output Y of layer for a given X
-    def forward_propagation(self, input):
+    # computes the output Y of layer for a given X, nothing is kept on the layer
+    def forward_propagation(self, input_data):
         raise NotImplementedError
 
 # Fully Connected layer
 class FCLayer(Layer):
     # input_size = number of input neurones
     # output_size = number of output neurones
-    def __init__(self, input_size, output_size):
-        self.weights = np.random.rand(input_size, output_size) - 0.5
-        self.bias = np.random.rand(1, output_size) - 0.5
+    # weights / bias = existing parameter arrays to use instead of random ones
+    # rng = np.random.Generator the random ones are drawn from in [-0.5, 0.5), weights first
+    def __init__(self, input_size, output_size, weights=None, bias=None, rng=None):
+        if weights is None or bias is None:
+            rng = rng if rng is not None else np.random.default_rng()
+        self.weights = rng.random((input_size, output_size)) - 0.5 if weights is None else weights
+        self.bias = rng.random((1, output_size)) - 0.5 if bias is None else bias
 
     # returns output for a given input
     def forward_propagation(self, input_data):
-        self.input = input_data
-        self.output = np.dot(self.input, self.weights) + self.bias
-        return self.output
+        return np.dot(input_data, self.weights) + self.bias
 
 # Activation Layer
 class ActivationLayer(Layer):
@@ -41,26 +55,216 @@ class ActivationLayer(Layer):
     
     # returns the activated input
     def forward_propagation(self, input_data):
-        self.input = input_data
-        self.output = self.activation(self.input)
-        return self.output
+        return self.activation(input_data)
+
+# Flat float32 vector holding every parameter of a network, shared copy on write between clones
+class Genome:
+    def __init__(self, data):
+        self.data = data
+        self.owners = weakref.WeakSet()
 
 class Network:
     def __init__(self):
         self.layers = []
         self.loss = None
         self.loss_prime = None
+        self.genome = None
+        self.plan = None
+        self.parameters = None
+        # what the inputs are and how many outputs are fed back as inputs, set by brains.Layout
+        self.inputs = defaultInputs
+        self.memory = 0
     
     # add layer to network
     def add(self, layer):
         self.layers.append(layer)
+        self.plan = None
+
+    # moves every layer's parameters into one genome, the layers keep views into it
+    def pack(self):
+        parameters = [array for layer in self.layers if isinstance(layer, FCLayer) for array in (layer.weights, layer.bias)]
+        self.bind(Genome(np.concatenate([array.ravel() for array in parameters]).astype(np.float32)))
+        return self
 
-    # predict output for given input
-    def predict(self, input_data):
-        # sample dimensions
+    # points the layer parameters at views into genome
+    def bind(self, genome):
+        offset = 0
+        for layer in self.layers:
+            if isinstance(layer, FCLayer):
+                shape, size = layer.weights.shape, layer.weights.size
+                layer.weights = genome.data[offset:offset + size].reshape(shape)
+                offset += size
+                shape, size = layer.bias.shape, layer.bias.size
+                layer.bias = genome.data[offset:offset + size].reshape(shape)
+                offset += size
+        if self.genome is not None:
+            self.genome.owners.discard(self)
+        self.genome = genome
+        genome.owners.add(self)
+        self.plan = None
 
-        output = input_data
+    # network sharing this one's genome, costs no parameter memory until either is written to
+    def clone(self):
+        if self.genome is None:
+            self.pack()
+        network = Network()
         for layer in self.layers:
-            output = layer.forward_propagation(output)
+            if isinstance(layer, FCLayer):
+                network.add(FCLayer(*layer.weights.shape, weights=layer.weights, bias=layer.bias))
+            else:
+                network.add(ActivationLayer(layer.activation))
+        network.inputs, network.memory = self.inputs, self.memory
+        network.bind(self.genome)
+        return network
+
+    # gives this network its own genome if it is shared, call before writing to the parameters
+    def makeUnique(self):
+        if self.genome is None:
+            self.pack()
+        elif len(self.genome.owners) > 1:
+            self.bind(Genome(self.genome.data.copy()))
+
+    # the shared forward plan of this network's topology and its parameters as views into the genome
+    # mutations write into the genome in place, so only a new genome or layer needs a new plan
+    def compile(self):
+        if self.genome is None:
+            self.pack()
+        self.plan = forwardPlan(topology(self))
+        self.parameters = self.plan.parameters(self.genome.data)
+        return self.plan
+
+    # predict output for given input, the caller owns the returned array
+    # out = a (rows, outputs) float32 array to write the result into instead, which allocates nothing
+    def predict(self, input_data, out=None):
+        plan = self.plan if self.plan is not None else self.compile()
+        output = plan.run(self.parameters, input_data) # scratch buffers shared by every network with this topology
+        if out is None:
+            return output.copy()
+        np.copyto(out, output)
+        return out
+        
+# Forward pass of one topology, compiled once and shared by every network with that topology
+# each fully connected layer is fused with the activation after it, its weights and bias are slices of the genome
+class ForwardPlan:
+    def __init__(self, signature):
+        self.signature = signature
+        self.steps = [] # [weights (start, shape), bias (start, size), activation], weights None for a lone activation
+        offset = 0
+        for step in signature:
+            if isinstance(step, tuple):
+                self.steps.append([(offset, step), (offset + step[0] * step[1], step[1]), None])
+                offset += step[0] * step[1] + step[1]
+            elif self.steps and self.steps[-1][2] is None and self.steps[-1][0] is not None:
+                self.steps[-1][2] = step
+            else:
+                self.steps.append([None, None, step])
+        self.size = offset
+        self.buffers = None
+
+    # (weights, bias) of every step for one genome, or for a (networks, parameters) matrix of them
+    # as (networks, in, out) and (networks, 1, out)
+    def parameters(self, data):
+        stacked = data.shape[:-1]
+        views = []
+        for weights, bias, _ in self.steps:
+            if weights is None:
+                views.append((None, None))
+                continue
+            (start, shape), (biasStart, size) = weights, bias
+            views.append((data[..., start:start + shape[0] * shape[1]].reshape(stacked + shape),
+                          data[..., biasStart:biasStart + size].reshape(stacked + (1, size))))
+        return views
+
+    # one float32 buffer for the input and every step's output, reused while the batch size stays the same
+    def allocate(self, rows, inputs):
+        buffers = [np.empty((rows, inputs), dtype=np.float32)]
+        for weights, _, _ in self.steps:
+            buffers.append(np.empty((rows, weights[1][1] if weights is not None else buffers[-1].shape[1]), dtype=np.float32))
+        self.buffers = buffers
+        return buffers
+
+    # forward pass of one network, allocates nothing once the buffers exist
+    # the result is the plan's last buffer, the next run overwrites it
+    def run(self, parameters, input_data):
+        buffers = self.buffers
+        rows, inputs = len(input_data), len(input_data[0])
+        if buffers is None or buffers[0].shape != (rows, inputs):
+            buffers = self.allocate(rows, inputs)
+        np.copyto(buffers[0], input_data)
+        output = buffers[0]
+        for (weights, bias), (_, _, activation), buffer in zip(parameters, self.steps, buffers[1:]):
+            if weights is not None:
+                np.dot(output, weights, out=buffer)
+                buffer += bias
+            else:
+                np.copyto(buffer, output)
+            if activation is not None:
+                activation(buffer, out=buffer)
+            output = buffer
         return output
-        
\ No newline at end of file
+
+    # forward pass of a (networks, parameters) genome matrix, one input row per network
+    # biases and activations are applied in place on each layer's matmul output
+    def runStacked(self, genomes, input_data):
+        output = np.ascontiguousarray(input_data, dtype=np.float32)[:, None, :] # -> (networks, 1, inputs), the memory layout changes matmul rounding
+        owned = False
+        for (weights, bias), (_, _, activation) in zip(self.parameters(genomes), self.steps):
+            if weights is not None:
+                output = np.matmul(output, weights)
+                output += bias
+                owned = True
+            if activation is not None:
+                output = activation(output, out=output if owned else None) # -> never write into the caller's input
+                owned = True
+        return output[:, 0, :]
+
+# compiled plans by topology
+plans = {}
+
+def forwardPlan(signature):
+    if signature not in plans:
+        plans[signature] = ForwardPlan(signature)
+    return plans[signature]
+
+# the output of every layer for one input, starting with the input itself
+# reads the parameters only, unlike predict it leaves nothing cached on the layers
+def trace(network, input_data):
+    outputs = [np.asarray(input_data, dtype=np.float32).ravel()]
+    for layer in network.layers:
+        if isinstance(layer, FCLayer):
+            outputs.append(np.dot(outputs[-1], layer.weights) + layer.bias.ravel())
+        else:
+            outputs.append(layer.activation(outputs[-1]))
+    return outputs
+
+# layer shapes and activations, networks with the same signature can be batched together
+def topology(network):
+    return tuple(layer.weights.shape if isinstance(layer, FCLayer) else layer.activation for layer in network.layers)
+
+# layer list of a network as plain data (shapes and activation names), for saving to disk
+# networks that see more than the sensor rays start with a {"inputs": [...], "memory": n} entry
+def describe(network):
+    description = [list(layer.weights.shape) if isinstance(layer, FCLayer) else layer.activation.__name__ for layer in network.layers]
+    if network.inputs != defaultInputs or network.memory:
+        description.insert(0, {'inputs': list(network.inputs), 'memory': network.memory})
+    return description
+
+# network with the layers of a description, its parameters bound to genome
+def build(description, genome):
+    network = Network()
+    for step in description:
+        if isinstance(step, dict):
+            network.inputs, network.memory = tuple(step['inputs']), step['memory']
+        elif isinstance(step, list):
+            network.add(FCLayer(*step, weights=np.zeros(step, dtype=np.float32), bias=np.zeros((1, step[1]), dtype=np.float32)))
+        else:
+            network.add(ActivationLayer(globals()[step]))
+    network.bind(genome)
+    return network
+
+# genomes of networks with one topology stacked into a (networks, parameters) matrix
+def stackGenomes(networks):
+    for network in networks:
+        if network.genome is None:
+            network.pack()
+    return np.stack([network.genome.data for network in networks])
@@ -0,0 +1,134 @@
+# -> imports
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import network as _network
+import sensor as _sensor
+import spatial as _spatial
+import brains as _brains
+from world import fields as worldFields, memorySize
+import os
+
+# -> world fields the workers read during the sensing and thinking phase
+snapshotFields = ['pos', 'heading', 'fov', 'rayLength', 'type', 'size', 'energy', 'maxEnergy', 'speed', 'topSpeed', 'memory'] # -> covers brains.stateFields
+
+# Numpy arrays backed by shared memory blocks, owned and unlinked by the process that made them
+class SharedArrays:
+    def __init__(self, specs):
+        self.blocks = {}
+        self.arrays = {}
+        for name, (shape, dtype) in specs.items():
+            dtype = np.dtype(dtype)
+            block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+            self.blocks[name] = block
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    # -> picklable description workers use to attach to the same blocks
+    def layout(self):
+        return {name: (self.blocks[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()}
+
+    def close(self):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+# -> shared memory blocks a worker has attached to, kept open between ticks
+_attached = {}
+
+def attach(layout):
+    names = set(blockName for blockName, _, _ in layout.values())
+    for blockName in list(_attached): # -> blocks from before a resize
+        if blockName not in names:
+            _attached.pop(blockName).close()
+    arrays = {}
+    for name, (blockName, shape, dtype) in layout.items():
+        if blockName not in _attached:
+            _attached[blockName] = shared_memory.SharedMemory(name=blockName)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=_attached[blockName].buf)
+    return arrays
+
+# -> worker side of the read phase, senses and thinks for creatures lo to hi
+# -> reads only the snapshot and writes only its own rows of the output arrays
+def thinkChunk(task):
+    layout, n, lo, hi, cellSize, screenDimensions, rayCount, signature = task
+    arrays = attach(layout)
+    rows = slice(lo, hi)
+    grid = _spatial.SpatialHash(cellSize, screenDimensions)
+    grid.build(arrays['pos'][:n])
+    intersects, ends = _sensor.senseAll(arrays['pos'][:n], arrays['heading'][:n], arrays['fov'][:n], arrays['rayLength'][:n],
+                                        arrays['type'][:n], arrays['size'][:n], rayCount, grid, rows)
+    arrays['intersects'][rows] = intersects
+    arrays['ends'][rows] = ends
+    if signature is not None:
+        names, memory, topology = signature
+        state = {name: arrays[name][:n] for name in _brains.stateFields}
+        inputs = _brains.inputs(names, memory, state, intersects[:, ::-1], np.arange(lo, hi), grid) # -> rays as the networks see them
+        outputs = _network.forwardPlan(topology).runStacked(arrays['genomes'][rows], inputs)
+        arrays['outputs'][rows, :outputs.shape[1]] = outputs
+
+# Persistent process pool for the sensing and thinking phase of a tick
+# -> the main process copies the world into a shared snapshot, the workers sense and think from that
+# -> snapshot into separate output arrays, then the main process applies movement to the world
+# -> no worker ever reads state that is being written, so results match the single process tick exactly
+class ParallelExecutor:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count()
+        self.pool = multiprocessing.get_context('spawn').Pool(self.workers)
+        self.shared = None
+        self.capacity = 0
+        self.signature = None
+
+    def allocate(self, capacity, rayCount, networks):
+        # -> (re)creates the shared blocks when the world outgrows them or the topology changes
+        if self.shared:
+            self.shared.close()
+        specs = {}
+        for name in snapshotFields:
+            dtype, shape = worldFields[name]
+            specs[name] = ((capacity,) + shape, dtype)
+        specs['intersects'] = ((capacity, rayCount), float)
+        specs['ends'] = ((capacity, rayCount, 2), float)
+        specs['outputs'] = ((capacity, 2 + memorySize), np.float32)
+        if self.signature is not None:
+            specs['genomes'] = ((capacity, networks[0].genome.data.size), np.float32)
+        self.shared = SharedArrays(specs)
+        self.capacity = capacity
+
+    def think(self, world, grid):
+        # -> returns (intersects, ray ends, network outputs) for every creature, thinkAll stores the memory outputs
+        # -> the outputs are None when the population mixes brain signatures and has to think in the main process
+        n = world.count
+        rayCount = world.creatures[0].sensor.rayCount
+        networks = [creature.network for creature in world.creatures]
+        signatures = set(_brains.signature(network) for network in networks)
+        signature = signatures.pop() if len(signatures) == 1 else None
+        if self.shared is None or n > self.capacity or signature != self.signature:
+            self.signature = signature
+            self.allocate(max(world.capacity, n), rayCount, networks)
+
+        # -> write phase of the snapshot, read by the workers
+        arrays = self.shared.arrays
+        for name in snapshotFields:
+            arrays[name][:n] = getattr(world, name)[:n]
+        if signature is not None:
+            arrays['genomes'][:n] = _network.stackGenomes(networks)
+
+        # -> read phase, one contiguous chunk of creatures per worker
+        bounds = np.linspace(0, n, min(self.workers, n) + 1).astype(int)
+        layout = self.shared.layout()
+        tasks = [(layout, n, lo, hi, grid.cellSize, grid.screenDimensions, rayCount, signature) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.pool.map(thinkChunk, tasks)
+
+        outputs = None
+        if signature is not None:
+            outputs = arrays['outputs'][:n].copy()
+        return arrays['intersects'][:n].copy(), arrays['ends'][:n].copy(), outputs
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        if self.shared:
+            self.shared.close()
+            self.shared = None
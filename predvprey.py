@@ -2,75 +2,47 @@
 
 # -> imports
 import creatures as _creatures
+import brains as _brains
+import checkpoint as _checkpoint
+import telemetry as _telemetry
+import archive as _archive
+import render as _render
+from simulation import Simulation
+from profiler import Profiler
 from pygame.locals import * 
-import threading
 import pygame
-import random
-import multiprocessing
-import math
+import argparse
+import json
 import time
 import sys
 
-pygame.init()
-
-def drawEye(creature, win):
-    pos = creature.pos
-    angle = math.radians(creature.angle)
-    intersects = creature.intersects
-    intersects.reverse()
-
-    pupilMajorDirection = intersects.index(max(intersects)) if intersects != [0, 0, 0, 0, 0, 0, 0, 0, 0, 0] else (len(intersects) - 1) / 2
-    pupilDirectionScalar = pupilMajorDirection / (len(intersects) - 1)
-    if creature.type == 'PREY':pupilDirectionScalar = 0.5
-    pupilAngle = -math.degrees(creature.fov) / 2 + math.degrees(creature.fov) * pupilDirectionScalar
-    pupilAngle += creature.angle + pupilAngle
-    pupilAngle = math.radians(pupilAngle)
-
-    startPos = (pos.x - math.sin(angle) * creature.size * 0.2, pos.y - math.cos(angle) * creature.size * 0.2)
-    pygame.draw.circle(win, (255, 255, 255), startPos, creature.size / 3) # -> the iris
-    pygame.draw.circle(win, (0, 0, 0), (startPos[0] - math.sin(pupilAngle) * creature.size / 6, startPos[1] - math.cos(pupilAngle) * creature.size / 6), creature.size / 5)
-
-def generateCreaturePool(preyCount, predCount, screenDimensions):
-    preys, preds = [], []
-    for _ in range(preyCount):
-        preys.append(_creatures.Prey(random.randint(0, screenDimensions[0]), random.randint(0, screenDimensions[1]), screenDimensions))
-    for _ in range(predCount):
-        preds.append(_creatures.Predator(random.randint(0, screenDimensions[0]), random.randint(0, screenDimensions[1]), screenDimensions))
-    return preys, preds, preys + preds
-
-# -> man in the middle function for threading
-def updateCreatures(pool, creatures):
-    for idx,creature in enumerate(pool):
-        creature.update(creatures)
-
-
-def main():
+def main(seed=None, workers=0, profiler=None, checkpointer=None, resume=None, archive=None, telemetry=None):
     # -> pygame setup
+    pygame.init()
     win = pygame.display.set_mode((800, 600))
     pygame.display.set_caption('Predator vs Prey')
     pygame.display.set_icon(pygame.image.load('brain.png'))
     screenDimensions = win.get_size()
 
-    # -> how long in ticks until a prey reproduces
-    preyReproductionInterval = 60 * 10
-
-    # -> func to draw the bg
+    # -> func to draw the bg, a copy of the pre-rendered grid
     def drawBackground():
-        win.fill((40, 42, 54))
-        for y in range(screenDimensions[1] // 50):
-            for x in range(screenDimensions[0] // 50):
-                pygame.draw.rect(win, (68, 71, 90), (x * 50, y * 50, 50, 50), 2)
+        win.blit(_render.background(screenDimensions), (0, 0))
 
     # -> simulation set up
-    preys, predators, creatures = generateCreaturePool(15, 15, screenDimensions)
+    simulation = startSimulation(screenDimensions, seed, workers, profiler, checkpointer, resume, archive, telemetry)
+    profiler = simulation.profiler
+    creatures = simulation.creatures
 
     # -> initial set up
     selectedCreature = None
     clock = pygame.time.Clock()
-    bestPreyPerformer = _creatures.Prey(-69, -69, screenDimensions) # -> template Prey
-    bestPredPerformer = _creatures.Predator(-69, -69, screenDimensions) # -> template Predator
+    sidebar = _creatures.CreatureSidebar(screenDimensions)
     sidebarOpenTimerMax = 20
     sidebarOpenTimer = 0
+    speed = 1
+    owedTicks = 0 # -> ticks the fixed timestep is behind real time
+    lastFrame = time.perf_counter()
+    tickTimes = [] # -> when recent ticks ran, for the speed readout
 
     while True: # -> game loop
 
@@ -83,18 +55,18 @@ def main():
         # -> event loop
         for event in events:
             if event.type == pygame.QUIT:
+                simulation.close()
                 pygame.quit()
                 return
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # -> left button down
                     if not selectedCreature:
-                        for creature in creatures:
-                            if creature.rect.collidepoint(pygame.mouse.get_pos()):
-                                selectedCreature = creature
-                                sidebarOpenTimer = 0
-                                creature.selected = True
-                                break
+                        creature = simulation.pick(pygame.mouse.get_pos())
+                        if creature:
+                            selectedCreature = creature
+                            sidebarOpenTimer = 0
+                            creature.selected = True
                     else:
                         if mousePos[0] > screenDimensions[0] * 0.3:
                             selectedCreature.selected = False
@@ -103,123 +75,37 @@ def main():
                         else:
                             clickedOnSideBar = True
 
-        # -> handling creature deaths
-        start = time.perf_counter_ns()
-        if creatures:
-            for idx, creature in sorted(enumerate(creatures), reverse=True):
-                if creature.dead:
-                    creatures.pop(idx)
-        if preys:
-            for idx, prey in sorted(enumerate(preys), reverse=True):
-                if prey.dead:
-                    preys.pop(idx)
-        if predators:
-            for idx, pred in sorted(enumerate(predators), reverse=True):
-                if pred.dead:
-                    predators.pop(idx)
+            if event.type == pygame.KEYDOWN and event.key in speedKeys:
+                speed = speedKeys[event.key]
+                owedTicks = 0
 
         # -> updates
         sidebarOpenTimer += 1 
         if sidebarOpenTimer > sidebarOpenTimerMax:
             sidebarOpenTimer = sidebarOpenTimerMax
-        
-        # threading test
-        a = creatures[:len(creatures) // 2]
-        b = creatures[len(creatures) // 2:]
-        x = threading.Thread(target=updateCreatures, args=[a, creatures])
-        y = threading.Thread(target=updateCreatures, args=[b, creatures])
-        start = time.perf_counter_ns()
-        x.start()
-        y.start()
-        x.join()
-        y.join()
-
-        
-        # -> handling reproductions
-        reproductionPool = []
-        for creature in creatures:
-            if creature.type == 'PREY' and creature.reproduceTimer > preyReproductionInterval:
-                reproductionPool.append(creature.reproduce())
-                creature.reproduceTimer = 0
-            elif creature.type == 'PREDATOR' and creature.reproduceKills >= creature.killsToReproduce:
-                reproductionPool.append(creature.reproduce())
-                creature.reproduceKills = 0    
-            creature.lifetime += 1
-            if creature.type == 'PREY':
-                creature.reproduceTimer += 1
-
-        # -> handling predator killing
-        for idx, prey in sorted(enumerate(preys), reverse=True):
-            for predator in predators:
-                if predator.rect.colliderect(prey.rect):
-                    predator.energy = predator.maxEnergy
-                    predator.kills += 1
-                    predator.reproduceKills += 1
-                    prey.dead = True
-                    if selectedCreature == prey:
-                        selectedCreature = None
-        
-        # -> seperate loop for inserting children into the creatures list
-        for child in reproductionPool:
-            creatures.append(child)
-            if isinstance(child, _creatures.Prey):
-                preys.append(child)
-            elif isinstance(child, _creatures.Predator):
-                predators.append(child)
-
-        # -> checking for best performers
-        for prey in preys:
-            if prey.lifetime >= bestPreyPerformer.lifetime and not prey.remoteControlled:
-                bestPreyPerformer = prey
-        for pred in predators:
-            if pred.kills * pred.lifetime >= bestPredPerformer.kills * bestPredPerformer.lifetime and not pred.remoteControlled:
-                bestPredPerformer = pred
-
-        # -> creature spawning
-        if not preys:
-            for _ in range(2):
-                spawned = bestPreyPerformer.clone()
-                preys.append(spawned)
-                creatures.append(spawned)
-            spawned = bestPreyPerformer.clone(mutate=False)
-            preys.append(spawned)
-            creatures.append(spawned)
-            spawned = bestPreyPerformer.clone(mutate=False)
-            preys.append(spawned)
-            creatures.append(spawned)
-            bestPreyPerformer = spawned
 
-        if not predators:
-            for _ in range(2):
-                spawned = bestPredPerformer.clone()
-                predators.append(spawned)
-                creatures.append(spawned)
-            spawned = bestPredPerformer.clone(mutate=False)
-            predators.append(spawned)
-            creatures.append(spawned)
-            spawned = bestPredPerformer.clone(mutate=False)
-            predators.append(spawned)
-            creatures.append(spawned)
-            spawned.kills += 1
-            bestPredPerformer = spawned
+        # -> fixed timestep, the simulation catches up with real time at tickRate * speed ticks per second
+        now = time.perf_counter()
+        owedTicks += (now - lastFrame) * tickRate * (speed or 0)
+        lastFrame = now
+        deadline = now + frameBudget
+        while (speed is None or owedTicks >= 1) and time.perf_counter() < deadline:
+            simulation.step()
+            owedTicks -= 1
+            tickTimes.append(time.perf_counter())
+        owedTicks = max(0, min(owedTicks, 1)) # -> adaptive frame skip, ticks that did not fit the budget are dropped
+        tickTimes = [tickTime for tickTime in tickTimes if tickTime > now - 1]
 
-        # -> killing off preys if they grow to much in numbers
-        if True: # -> temporarily disabled
-            if len(preys) > 50:
-                for prey in random.sample(preys, len(preys) - 50):
-                    # -> caps prey count at 50
-                    prey.dead = True
-        
         if selectedCreature:
             if selectedCreature.dead:
                 selectedCreature.remoteControlled = False
                 selectedCreature = None
         
-        # -> render
+        # -> render, timed on its own since frames that run no ticks never call profiler.begin()
+        profiler.begin()
         drawBackground()
-        for creature in creatures:
-            if not creature.dead:
-                creature.draw(win)
+        detail = simulation.world.count <= _render.detailLimit # -> eyes and rays only while they stay cheap
+        _render.drawBodies(win, simulation.world, rays=detail)
         if selectedCreature:
             pygame.draw.circle(win, (255, 121, 198), selectedCreature.rect.center, selectedCreature.size // 2, 2)
             pygame.draw.polygon(win, (255, 121, 198), [
@@ -227,12 +113,12 @@ def main():
                 (selectedCreature.pos.x - selectedCreature.size / 3, selectedCreature.pos.y - 1.2 * selectedCreature.size),
                 (selectedCreature.pos.x + selectedCreature.size / 3, selectedCreature.pos.y - 1.2 * selectedCreature.size)
                 ])
-        for creature in creatures:
-            drawEye(creature, win)
+        if detail:
+            _render.drawEyes(win, simulation.world)
         
         # draw a crown on the best performer (if on screen)
-        if bestPredPerformer in creatures:
-            pred = bestPredPerformer
+        if simulation.bestPredPerformer in creatures:
+            pred = simulation.bestPredPerformer
             if pred.selected:
                 pygame.draw.polygon(win, (255, 230, 0),[
                 (pred.pos.x - pred.size / 2, pred.pos.y - pred.size * 2.2),
@@ -252,21 +138,99 @@ def main():
                 ])
 
         # -> render the inspect side bar
-        if selectedCreature:win.blit(_creatures.generateCreatureSidebar(selectedCreature, screenDimensions, clickedOnSideBar, mousePos),
+        if selectedCreature:win.blit(sidebar.draw(selectedCreature, clickedOnSideBar, mousePos),
         (-screenDimensions[0] * 0.3 + (sidebarOpenTimer / sidebarOpenTimerMax) * screenDimensions[0] * 0.3, 0))
 
-        pygame.display.update()
-        clock.tick(60)
-
-main()
-sys.exit()
+        # -> speed readout
+        readout = ('max' if speed is None else str(speed) + 'x') + '  ' + str(len(tickTimes)) + ' ticks/s'
+        win.blit(_creatures.getFontObject(readout, fontSize=14, colour=(248, 248, 242)), (screenDimensions[0] * 0.3 + 5, screenDimensions[1] - 20))
 
-import cProfile
-import pstats
+        # -> phase timings overlay
+        profiler.lap('render')
+        if profiler.enabled:
+            for idx, line in enumerate(profiler.lines()):
+                fontObject = _creatures.getFontObject(line, fontSize=14, colour=(248, 248, 242))
+                win.blit(fontObject, (screenDimensions[0] - fontObject.get_width() - 5, 5 + idx * 15))
 
-with cProfile.Profile() as pr:
-    main()
-
-stats = pstats.Stats(pr)
-stats.sort_stats(pstats.SortKey.TIME)
-stats.print_stats()
\ No newline at end of file
+        pygame.display.update()
+        clock.tick(60 if speed is not None else 0) # -> at max speed ticking fills the frame instead of sleeping
+
+# -> simulation ticks per second at 1x, and the speed hotkeys, None runs as many ticks as the frame budget allows
+tickRate = 60
+speedKeys = {K_1: 1, K_2: 10, K_3: 100, K_4: None}
+# -> seconds of ticking per rendered frame, past it the remaining ticks are dropped so the window stays responsive
+frameBudget = 1 / 30
+
+# -> a fresh simulation, or the one saved in the resume checkpoint
+def startSimulation(screenDimensions, seed=None, workers=0, profiler=None, checkpointer=None, resume=None, archive=None, telemetry=None):
+    if resume:
+        simulation = _checkpoint.load(resume, workers, profiler, archive)
+        simulation.checkpointer = checkpointer
+        simulation.telemetry = telemetry
+        print('Resumed', resume, 'at tick', simulation.ticks)
+        return simulation
+    return Simulation(screenDimensions, seed=seed, workers=workers, profiler=profiler, checkpointer=checkpointer, archive=archive, telemetry=telemetry)
+
+# -> runs the simulation without a window as fast as the cpu allows
+def runHeadless(ticks, seed=None, workers=0, profiler=None, checkpointer=None, resume=None, archive=None, telemetry=None):
+    simulation = startSimulation((800, 600), seed, workers, profiler, checkpointer, resume, archive, telemetry)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        simulation.step()
+    elapsed = time.perf_counter() - start
+    simulation.close()
+    print('Ran', ticks, 'ticks in', str(round(elapsed, 2)) + 's', '(' + str(round(ticks / elapsed, 1)), 'ticks/s)')
+    print('Preys:', len(simulation.preys), 'Predators:', len(simulation.predators))
+    if simulation.streams.entropy is not None: # -> checkpoints from before the seed was saved do not know it
+        print('Seed:', simulation.streams.entropy) # -> --seed with this replays the run
+    if simulation.profiler.enabled:
+        for line in simulation.profiler.lines():
+            print(line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Predator vs Prey simulation')
+    parser.add_argument('--headless', action='store_true', help='run without a window or rendering')
+    parser.add_argument('--ticks', type=int, default=10000, help='ticks to run in headless mode')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the random number generators')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes for sensing and thinking, 0 runs in this process')
+    parser.add_argument('--timings', action='store_true', help='time every tick phase, shown as an overlay or printed at the end')
+    parser.add_argument('--timings-log', default=None, help='append phase percentiles to this csv (or .json lines) file')
+    parser.add_argument('--timings-every', type=int, default=600, help='ticks between timings log entries')
+    parser.add_argument('--checkpoint', default=None, help='save the whole run to this .npz file periodically and on exit')
+    parser.add_argument('--checkpoint-every', type=int, default=3600, help='ticks between checkpoints')
+    parser.add_argument('--resume', default=None, help='continue the run saved in this checkpoint')
+    parser.add_argument('--archive', default=None, help='hall of fame files to record every dead brain in and respawn from')
+    parser.add_argument('--archive-top', type=int, default=100, help='brains per species respawns are sampled from')
+    parser.add_argument('--prey-brain', default=None, help='json object of brains.Layout arguments new prey brains are built with')
+    parser.add_argument('--predator-brain', default=None, help='json object of brains.Layout arguments new predator brains are built with')
+    parser.add_argument('--telemetry', default=None, help='stream population, evolution and tick latency statistics to this csv (or .json lines) file')
+    parser.add_argument('--telemetry-every', type=int, default=60, help='ticks between telemetry records')
+    parser.add_argument('--profile', default=None, help='write a cProfile dump to this file, read it with pstats')
+    args = parser.parse_args()
+
+    if args.prey_brain:
+        _creatures.preyLayout = _brains.Layout(**json.loads(args.prey_brain))
+    if args.predator_brain:
+        _creatures.predatorLayout = _brains.Layout(**json.loads(args.predator_brain))
+    profiler = Profiler(args.timings or bool(args.timings_log), logPath=args.timings_log, logEvery=args.timings_every)
+    if args.profile:
+        import cProfile
+        import pstats
+        pr = cProfile.Profile()
+        pr.enable()
+
+    checkpointer = _checkpoint.Checkpointer(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    archive = _archive.GenomeArchive(args.archive, args.archive_top) if args.archive else None
+    telemetry = _telemetry.Telemetry(args.telemetry, args.telemetry_every) if args.telemetry else None
+    if args.headless:
+        runHeadless(args.ticks, args.seed, args.workers, profiler, checkpointer, args.resume, archive, telemetry)
+    else:
+        main(args.seed, args.workers, profiler, checkpointer, args.resume, archive, telemetry)
+
+    if args.profile:
+        pr.disable()
+        pr.dump_stats(args.profile)
+        stats = pstats.Stats(pr)
+        stats.sort_stats(pstats.SortKey.TIME)
+        stats.print_stats(15)
+    sys.exit()
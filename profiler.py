@@ -0,0 +1,66 @@
+import numpy as np
+import json
+import time
+
+# -> tick phases in the order they run, render only happens in the window
+phases = ['sensing', 'inference', 'movement', 'reproduction', 'kills', 'best performers', 'respawn', 'death sweep', 'grid', 'render']
+
+# Per phase tick timers with rolling percentiles
+# -> call begin() at the start of a tick and lap(name) after each phase, both do nothing when disabled
+# -> logPath ending in .json writes json lines, anything else writes csv, every logEvery ticks
+class Profiler:
+    def __init__(self, enabled=False, window=300, logPath=None, logEvery=600):
+        self.enabled = enabled
+        self.window = window
+        self.logPath = logPath
+        self.logEvery = logEvery
+        self.samples = {}
+        self.counts = {}
+        self.ticks = 0
+        self.last = 0
+        if logPath and not logPath.endswith('.json'):
+            with open(logPath, 'w') as file:
+                file.write('tick,phase,samples,mean_ms,p50_ms,p90_ms,p99_ms\n')
+
+    def begin(self):
+        if self.enabled:
+            self.last = time.perf_counter_ns()
+
+    def lap(self, name):
+        # -> time since the previous lap goes to phase name
+        if self.enabled:
+            now = time.perf_counter_ns()
+            if name not in self.samples:
+                self.samples[name] = np.zeros(self.window)
+                self.counts[name] = 0
+            self.samples[name][self.counts[name] % self.window] = now - self.last
+            self.counts[name] += 1
+            self.last = now
+
+    def endTick(self):
+        if self.enabled:
+            self.ticks += 1
+            if self.logPath and self.ticks % self.logEvery == 0:
+                self.log()
+
+    def summary(self):
+        # -> {phase: {samples, mean, p50, p90, p99}} in milliseconds over the rolling window
+        summary = {}
+        for name in sorted(self.samples, key=lambda name: phases.index(name) if name in phases else len(phases)):
+            recent = self.samples[name][:min(self.counts[name], self.window)] / 1e6
+            p50, p90, p99 = np.percentile(recent, [50, 90, 99])
+            summary[name] = {'samples': int(self.counts[name]), 'mean': float(recent.mean()), 'p50': float(p50), 'p90': float(p90), 'p99': float(p99)}
+        return summary
+
+    def log(self):
+        summary = self.summary()
+        with open(self.logPath, 'a') as file:
+            for name, stats in summary.items():
+                if self.logPath.endswith('.json'):
+                    file.write(json.dumps(dict(tick=self.ticks, phase=name, **stats)) + '\n')
+                else:
+                    file.write(f"{self.ticks},{name},{stats['samples']},{stats['mean']:.4f},{stats['p50']:.4f},{stats['p90']:.4f},{stats['p99']:.4f}\n")
+
+    def lines(self):
+        # -> one readable line per phase, for printing or the window overlay
+        return [f"{name:<16}p50 {stats['p50']:6.2f}ms  p99 {stats['p99']:6.2f}ms" for name, stats in self.summary().items()]
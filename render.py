@@ -0,0 +1,120 @@
+# -> imports
+from sensor import roundHalfAway, perFov, rotate
+from world import PREY
+import numpy as np
+import functools
+import math
+import pygame
+
+# -> everything here is drawn once and reused, the caches are keyed on what the drawing depends on
+# -> and bounded, so a frame only pays for blits
+
+@functools.lru_cache(maxsize=4)
+def background(screenDimensions):
+    # -> the static grid the creatures move over
+    surface = pygame.Surface(screenDimensions)
+    surface.fill((40, 42, 54))
+    for y in range(screenDimensions[1] // 50):
+        for x in range(screenDimensions[0] // 50):
+            pygame.draw.rect(surface, (68, 71, 90), (x * 50, y * 50, 50, 50), 2)
+    return surface
+
+@functools.lru_cache(maxsize=16)
+def font(fontSize, name='Consolas'):
+    return pygame.font.SysFont(name, fontSize)
+
+@functools.lru_cache(maxsize=512)
+def text(msg, fontSize=24, colour=(0, 0, 0)):
+    # -> rendered text surface, shared between callers so it must only be blitted, never drawn on
+    return font(fontSize).render(msg, True, colour)
+
+# Pre-rendered circles for one creature look, packed side by side in a single surface
+# -> frames are drawn with pygame.draw.circle at an integer centre, and pygame truncates both the
+# -> centre and the radius of a circle, so blitting a frame at int(centre) gives the same pixels
+class SpriteAtlas:
+    def __init__(self, circles):
+        # -> circles: {frame name: (colour, radius)}
+        self.frames = {}
+        width, height = 0, 0
+        for name, (colour, radius) in circles.items():
+            span = 2 * int(radius) + 2
+            self.frames[name] = (pygame.Rect(width, 0, span, span), int(radius) + 1)
+            width += span
+            height = max(height, span)
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for name, (colour, radius) in circles.items():
+            rect, offset = self.frames[name]
+            pygame.draw.circle(self.surface, colour, (rect.x + offset, offset), radius)
+
+    def blit(self, win, name, centre):
+        rect, offset = self.frames[name]
+        win.blit(self.surface, (int(centre[0]) - offset, int(centre[1]) - offset), rect)
+
+    def placement(self, name, centre):
+        # -> (surface, destination, area) of a frame, for Surface.blits
+        rect, offset = self.frames[name]
+        return self.surface, (int(centre[0]) - offset, int(centre[1]) - offset), rect
+
+@functools.lru_cache(maxsize=16)
+def creatureAtlas(colour, size):
+    # -> body, iris and pupil of every creature with this colour and size
+    return SpriteAtlas({
+        'body': (colour, size / 2),
+        'iris': ((255, 255, 255), size / 3),
+        'pupil': ((0, 0, 0), size / 5),
+    })
+
+# -> creature count above which only bodies are drawn, eyes and sensor rays are skipped
+detailLimit = 400
+
+def atlases(world, n):
+    # -> the atlas of every creature, looked up once per (type, size) pair in the population
+    keys = world.type[:n].astype(np.int64) * 1000 + world.size[:n]
+    uniques, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    found = [creatureAtlas(world.creatures[idx].colour, int(world.size[idx])) for idx in first]
+    return [found[idx] for idx in inverse.tolist()]
+
+def drawBodies(win, world, rays=True):
+    # -> every body in one Surface.blits call, the rays of selected creatures go under the bodies after them
+    n = world.count
+    if not n:
+        return
+    centres = roundHalfAway(world.pos[:n]).astype(int).tolist()
+    blits = [atlas.placement('body', centre) for atlas, centre in zip(atlases(world, n), centres)]
+    start = 0
+    if rays:
+        for idx, creature in enumerate(world.creatures):
+            if creature.selected:
+                win.blits(blits[start:idx], doreturn=False)
+                for ray in creature.sensor.rays:
+                    pygame.draw.line(win, ray[2], ray[0], ray[1], 2)
+                start = idx
+    win.blits(blits[start:], doreturn=False)
+
+@functools.lru_cache(maxsize=16)
+def pupilTable(fov, rayCount):
+    # -> (sin, cos) of the pupil's turn from the heading when it looks down each ray, the last entry looks straight ahead
+    scalar = np.append(np.arange(rayCount) / (rayCount - 1), 0.5)
+    offsets = np.radians(2 * (-math.degrees(fov) / 2 + math.degrees(fov) * scalar))
+    return np.sin(offsets), np.cos(offsets)
+
+def drawEyes(win, world):
+    # -> iris and pupil of every creature in one Surface.blits call, the pupil looks towards the strongest ray
+    n = world.count
+    if not n:
+        return
+    pos, size, heading = world.pos[:n], world.size[:n].astype(float), world.heading[:n]
+    intersects = np.array([creature.intersects for creature in world.creatures], dtype=float)[:, ::-1] # -> ray order as sensed
+    rayCount = intersects.shape[1]
+    looking = intersects.any(axis=1) & (world.type[:n] != PREY)
+    direction = np.where(looking, intersects.argmax(axis=1), rayCount)
+    sin, cos = perFov(world.fov[:n], pupilTable, rayCount)
+    rows = np.arange(n)
+    pupilSin, pupilCos = rotate(heading, sin[rows, direction][:, None], cos[rows, direction][:, None])
+    irisX, irisY = pos[:, 0] - heading[:, 0] * size * 0.2, pos[:, 1] - heading[:, 1] * size * 0.2
+    pupilX, pupilY = irisX - pupilSin[:, 0] * size / 6, irisY - pupilCos[:, 0] * size / 6
+    blits = []
+    for atlas, iris, pupil in zip(atlases(world, n), zip(irisX.tolist(), irisY.tolist()), zip(pupilX.tolist(), pupilY.tolist())):
+        blits.append(atlas.placement('iris', iris))
+        blits.append(atlas.placement('pupil', pupil))
+    win.blits(blits, doreturn=False)
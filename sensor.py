@@ -1,6 +1,6 @@
 import math
 import pygame
-import time 
+import numpy as np
 
 def lerp(a, b, t):
     return a + (a - b) * t
@@ -14,11 +14,31 @@ class Sensor:
         self.rayLength = raylength
         self.fov = self.creature.fov # -> radians
         self.rays = []
+
+    # -> rays from a batched pass are only turned into lists when something draws them
+    @property
+    def rays(self):
+        if self._rays is None:
+            start, ends, intersects = self._rayArrays
+            start = start.tolist()
+            self._rays = [[start, end, (255, 85, 85) if intersect != 0 else (80, 250, 123)]
+                          for end, intersect in zip(ends.tolist(), intersects)]
+        return self._rays
+
+    @rays.setter
+    def rays(self, rays):
+        self._rays = rays
+
+    def setRays(self, start, ends, intersects):
+        # -> ray geometry from a batched pass, same layout as Sensor.update
+        self._rayArrays = (start, ends, intersects)
+        self._rays = None
     
-    def intersects(self, angle, creatures):
+    def intersects(self, direction, creatures):
+        # -> direction is the (sin, cos) of the ray angle
         for dist in range(1, self.rayLength, 5):
-            pos = (self.creature.pos.x - math.sin(angle) * dist,
-                   self.creature.pos.y - math.cos(angle) * dist)
+            pos = (self.creature.pos.x - direction[0] * dist,
+                   self.creature.pos.y - direction[1] * dist)
             for creature in creatures:
                 if creature.type == self.creature.type:
                     continue
@@ -29,21 +49,18 @@ class Sensor:
     def update(self, creatures):
         intersects = []
         self.rays = []
-        angles = []
-        startTime = time.perf_counter_ns()
+        # -> ray directions from the creature's heading and the fan table of its species
+        heading = self.creature.world.heading[self.creature.index]
+        sin, cos = rayDirections(heading[None, :], np.array([self.fov]), self.rayCount)
+        directions = list(zip(sin[0].tolist(), cos[0].tolist()))
         for i in range(self.rayCount):
-            radians = math.radians(self.creature.angle) - math.radians(45)
-            angle = lerp(self.fov / 2, - self.fov / 2, i / (self.rayCount - 1)) + radians
             start = [self.creature.pos.x, self.creature.pos.y]
-            angles.append(angle)
-            end = [self.creature.pos.x - math.sin(angle) * self.rayLength,
-                   self.creature.pos.y - math.cos(angle) * self.rayLength]
+            end = [self.creature.pos.x - directions[i][0] * self.rayLength,
+                   self.creature.pos.y - directions[i][1] * self.rayLength]
             self.rays.append([start, end])
-        #print('Calculating Rays Took:', str(time.perf_counter_ns() - startTime))
-        
-        startTime = time.perf_counter_ns()
-        for i in range(len(angles)): # -> in parallel with rays[] 
-            intersect = self.intersects(angles[i], creatures)
+
+        for i in range(len(directions)): # -> in parallel with rays[] 
+            intersect = self.intersects(directions[i], creatures)
             intersects.append(intersect)
             deltaX = self.rays[i][1][0] - self.rays[i][0][0]
             deltaY = self.rays[i][1][1] - self.rays[i][0][1]
@@ -54,7 +71,6 @@ class Sensor:
                 self.rays[i].append((255, 85, 85))
             else:
                 self.rays[i].append((80, 250, 123))
-        #print('Testing For Intersects Took:', str(time.perf_counter_ns() - startTime))
         return intersects
         
         '''
@@ -80,4 +96,165 @@ class Sensor:
                 intersects.append(0)
                 self.rays.append([start, end, (0, 247, 70)])
         return intersects
-        '''
\ No newline at end of file
+        '''
+
+
+# -> batched ray casting, all rays of all creatures in one numpy pass
+
+stepSize = 5
+_scoreTables = {}
+
+def scoreTable(rayLength):
+    # -> intersect value for every march step, rounded exactly like Sensor.intersects
+    if rayLength not in _scoreTables:
+        _scoreTables[rayLength] = np.array([round(1 - dist / rayLength, 2) for dist in range(1, rayLength, stepSize)] + [0])
+    return _scoreTables[rayLength]
+
+def roundHalfAway(x):
+    # -> pygame rounds rect centers half away from zero
+    return np.copysign(np.floor(np.abs(x) + 0.5), x)
+
+def rectArray(positions, sizes):
+    # -> (x, y, w, h) of the rect pygame would centre on each position
+    rects = np.empty((len(positions), 4))
+    rects[:, 0] = roundHalfAway(positions[:, 0]) - sizes // 2
+    rects[:, 1] = roundHalfAway(positions[:, 1]) - sizes // 2
+    rects[:, 2] = sizes
+    rects[:, 3] = sizes
+    return rects
+
+# -> the ray fan only depends on a species' fov and ray count, so the trig of every ray's
+# -> offset from the heading is worked out once and rotated onto each creature's heading vector
+_rayTables = {}
+
+def rayTable(fov, rayCount):
+    # -> (sin, cos) of every ray's angle relative to the heading, same fan as the original Sensor.update
+    if (fov, rayCount) not in _rayTables:
+        offsets = lerp(fov / 2, -fov / 2, np.arange(rayCount) / (rayCount - 1)) - math.radians(45)
+        _rayTables[(fov, rayCount)] = (np.sin(offsets), np.cos(offsets))
+    return _rayTables[(fov, rayCount)]
+
+def perFov(fovs, table, *args):
+    # -> every creature's row of a table built once per distinct fov, one array per column of the table
+    fans, inverse = np.unique(fovs, return_inverse=True)
+    tables = [table(float(fov), *args) for fov in fans]
+    return [np.stack(columns)[inverse] for columns in zip(*tables)]
+
+def rotate(headings, sin, cos):
+    # -> (sin, cos) of heading + offset from the heading vectors and the offset's (sin, cos)
+    sinH, cosH = headings[:, 0:1], headings[:, 1:2]
+    return sinH * cos + cosH * sin, cosH * cos - sinH * sin
+
+def rayDirections(headings, fovs, rayCount):
+    # -> (sin, cos) of every ray of every creature, (n, rayCount) each, without any trig calls
+    return rotate(headings, *perFov(fovs, rayTable, rayCount))
+
+# -> pairs cast per pass and casters gathered per pass, every pass's temporaries are (pairs, rays) arrays
+# -> so these bound the memory sensing needs however crowded the world gets
+pairChunk = 1 << 14
+casterChunk = 256
+
+def castRays(origins, sin, cos, rayLengths, rects, casters, targets):
+    # -> origins (n, 2), sin / cos (n, rays) ray directions, rayLengths (n,), rects (m, 4)
+    # -> casters / targets are parallel index arrays of candidate (caster, target) pairs
+    # -> returns the first hit march step for every ray, len(range(1, rayLength, 5)) on a miss
+    stepCounts = (rayLengths - 2) // stepSize + 1
+    hits = np.repeat(stepCounts[:, None], sin.shape[1], axis=1)
+    for start in range(0, len(casters), pairChunk):
+        chunk = casters[start:start + pairChunk]
+        np.minimum.at(hits, chunk, pairHits(origins, sin, cos, stepCounts, rects, chunk, targets[start:start + pairChunk]))
+    return hits
+
+def pairHits(origins, sin, cos, stepCounts, rects, casters, targets):
+    # -> first hit march step of every ray of every (caster, target) pair, the caster's step count on a miss
+    ox, oy = origins[casters, 0][:, None], origins[casters, 1][:, None]
+    sinP, cosP = sin[casters], cos[casters]
+    rect = rects[targets]
+    left, top = rect[:, 0:1], rect[:, 1:2]
+    right, bottom = left + rect[:, 2:3], top + rect[:, 3:4]
+
+    # -> slab test on the continuous interval the truncated point can land in
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lowX, highX = np.where(left >= 1, left, left - 1), np.where(right >= 1, right, right - 1)
+        lowY, highY = np.where(top >= 1, top, top - 1), np.where(bottom >= 1, bottom, bottom - 1)
+        tx1, tx2 = (ox - lowX) / sinP, (ox - highX) / sinP
+        ty1, ty2 = (oy - lowY) / cosP, (oy - highY) / cosP
+        enter = np.maximum(np.minimum(tx1, tx2), np.minimum(ty1, ty2))
+        leave = np.minimum(np.maximum(tx1, tx2), np.maximum(ty1, ty2))
+        enter = np.where(np.isnan(enter), -np.inf, enter)
+    first = np.ceil((np.maximum(enter, 1) - 1) / stepSize)
+    first = np.where((leave >= 1) & (enter <= leave) & np.isfinite(first), first, np.inf)
+
+    # -> confirm the analytic guess with the exact point test Sensor.intersects does
+    limit = stepCounts[casters][:, None]
+    found = np.full(sinP.shape, np.inf)
+    for offset in (1, 0, -1):
+        step = first + offset
+        valid = (step >= 0) & (step < limit)
+        step = np.where(valid, step, 0)
+        dist = 1 + step * stepSize
+        px, py = np.trunc(ox - sinP * dist), np.trunc(oy - cosP * dist)
+        inside = valid & (px >= left) & (px < right) & (py >= top) & (py < bottom)
+        found = np.where(inside, step, found)
+    return np.where(np.isinf(found), limit, found).astype(int)
+
+def rayEnds(origins, sin, cos, rayLengths, intersects):
+    # -> shortened ray end points, same arithmetic as Sensor.update
+    endX = origins[:, 0:1] - sin * rayLengths[:, None]
+    endY = origins[:, 1:2] - cos * rayLengths[:, None]
+    deltaX, deltaY = endX - origins[:, 0:1], endY - origins[:, 1:2]
+    return np.stack([endX - deltaX + (deltaX * (1 - intersects)),
+                     endY - deltaY + (deltaY * (1 - intersects))], axis=-1)
+
+def candidates(centres, origins, rayLengths, casterTypes, casterSizes, types, sizes, grid=None):
+    # -> (caster, target) pairs a ray can hit: the other species and within reach, rays do not wrap around the screen
+    # -> gathered a chunk of casters at a time so the unfiltered pairs never all exist at once
+    casters, targets = [], []
+    for start in range(0, len(origins), casterChunk):
+        stop = min(start + casterChunk, len(origins))
+        if grid is None:
+            chunkCasters, chunkTargets = np.nonzero(casterTypes[start:stop, None] != types[None, :])
+        else:
+            chunkCasters, chunkTargets = grid.pairs(origins[start:stop], rayLengths[start:stop] + casterSizes[start:stop])
+        chunkCasters += start
+        reach = rayLengths[chunkCasters] + sizes[chunkTargets] + 2 # -> past this not even a truncated march point lands in the rect
+        offset = centres[chunkTargets] - origins[chunkCasters]
+        keep = (casterTypes[chunkCasters] != types[chunkTargets]) & (offset[:, 0] ** 2 + offset[:, 1] ** 2 <= reach ** 2)
+        casters.append(chunkCasters[keep])
+        targets.append(chunkTargets[keep])
+    if not casters:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    return np.concatenate(casters), np.concatenate(targets)
+
+def senseAll(origins, headings, fovs, rayLengths, types, sizes, rayCount=10, grid=None, rows=slice(None)):
+    # -> array level sensing for a whole population, returns intersects and ray ends
+    # -> only the creatures picked by rows cast rays, everyone can be hit by them
+    # -> with a grid built from origins only creatures in nearby cells are tested
+    # -> headings are the (sin, cos) heading vectors World keeps
+    rects = rectArray(origins, sizes)
+    centres = origins
+    origins, rayLengths, casterTypes = origins[rows], rayLengths[rows], types[rows]
+    sin, cos = rayDirections(headings[rows], fovs[rows], rayCount)
+    casters, targets = candidates(centres, origins, rayLengths, casterTypes, sizes[rows], types, sizes, grid)
+    hits = castRays(origins, sin, cos, rayLengths, rects, casters, targets)
+    intersects = np.zeros(hits.shape)
+    for rayLength in np.unique(rayLengths):
+        rows = rayLengths == rayLength
+        intersects[rows] = scoreTable(int(rayLength))[hits[rows]]
+    return intersects, rayEnds(origins, sin, cos, rayLengths, intersects)
+
+def senseWorld(world, grid=None):
+    # -> batched sensing straight from the World arrays, grid must be built from world.pos
+    n = world.count
+    if not n:
+        return []
+    origins = world.pos[:n].copy()
+    intersects, ends = senseAll(origins, world.heading[:n], world.fov[:n], world.rayLength[:n], world.type[:n],
+                                world.size[:n], world.creatures[0].sensor.rayCount, grid)
+    return setWorldRays(world, origins, ends, intersects)
+
+def setWorldRays(world, origins, ends, intersects):
+    # -> hands batched results to every creature's sensor, returns the intersects as lists
+    for idx, creature in enumerate(world.creatures):
+        creature.sensor.setRays(origins[idx], ends[idx], intersects[idx])
+    return intersects.tolist()
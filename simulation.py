@@ -0,0 +1,172 @@
+# -> imports
+import creatures as _creatures
+import collision as _collision
+import fitness as _fitness
+import sensor as _sensor
+import spatial as _spatial
+import world as _world
+from parallel import ParallelExecutor
+from profiler import Profiler
+from streams import RandomStreams
+import numpy as np
+
+def generateCreaturePool(preyCount, predCount, screenDimensions, world):
+    # -> every spawn position drawn in one go from the world's spawn stream
+    positions = world.streams.spawn.integers(0, screenDimensions, endpoint=True, size=(preyCount + predCount, 2)).tolist()
+    for x, y in positions[:preyCount]:
+        _creatures.Prey(x, y, screenDimensions, world)
+    for x, y in positions[preyCount:]:
+        _creatures.Predator(x, y, screenDimensions, world)
+    return world.members(_world.PREY), world.members(_world.PREDATOR), world.creatures
+
+# Simulation state and tick logic, no pygame display or rendering involved
+class Simulation:
+    def __init__(self, screenDimensions=(800, 600), preyCount=15, predCount=15, seed=None, workers=0, profiler=None, checkpointer=None, archive=None, fitness=None, telemetry=None):
+        self.streams = RandomStreams(seed) # -> every random draw of the run, the same seed replays it exactly
+        self.screenDimensions = screenDimensions
+        self.ticks = 0
+        self.totalKills = 0
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.checkpointer = checkpointer # -> checkpoint.Checkpointer, saves the run every so often
+        self.telemetry = telemetry # -> telemetry.Telemetry, streams population and evolution statistics to a file
+        self.archive = archive # -> archive.GenomeArchive, every dead brain goes in and respawns come out of it
+
+        # -> how long in ticks until a prey reproduces
+        self.preyReproductionInterval = 60 * 10
+        # -> prey population cap
+        self.maxPreys = 50
+
+        # -> simulation set up, the world owns every creature and preys/predators are live views into it
+        self.world = _world.World(screenDimensions, streams=self.streams)
+        self.preys, self.predators, self.creatures = generateCreaturePool(preyCount, predCount, screenDimensions, self.world)
+        self.bestPreyPerformer = _creatures.Prey(-69, -69, screenDimensions, _world.World(screenDimensions, 1, self.streams)) # -> template Prey
+        self.bestPredPerformer = _creatures.Predator(-69, -69, screenDimensions, _world.World(screenDimensions, 1, self.streams)) # -> template Predator
+        # -> ranks the creatures by fitness as they are born, kill and die, fitness maps species to a fitness.py function
+        self.tracker = _fitness.FitnessTracker(self.world, fitness)
+        if archive is not None:
+            archive.rng = self.streams.archive
+            archive.fitness = self.tracker.fitness
+
+        # -> spatial index for neighbour queries, cells sized by the shorter sensor
+        self.grid = _spatial.SpatialHash(min(_creatures.preySensorLength, _creatures.predatorSensorLength), screenDimensions)
+        self.grid.build(self.world.pos[:self.world.count])
+
+        # -> sensing and thinking can be spread over worker processes
+        self.executor = ParallelExecutor(workers) if workers else None
+
+    def close(self):
+        if self.executor:
+            self.executor.close()
+        if self.checkpointer:
+            self.checkpointer.close(self)
+        if self.telemetry:
+            self.telemetry.close()
+        if self.archive:
+            self.archive.close()
+
+    # -> creature under a screen position, uses the grid from the last tick
+    def pick(self, pos):
+        reach = 15 + 4 + 1 # -> creature size plus one move since the grid was built
+        candidates = self.grid.query(pos[0], pos[1], reach).tolist() + list(range(self.grid.count, self.world.count))
+        for idx in candidates:
+            creature = self.creatures[idx]
+            if not creature.dead and creature.rect.collidepoint(pos):
+                return creature
+        return None
+
+    def resolveKills(self, count=None):
+        # -> handling predator killing, every kill of the tick is found in one pass
+        # -> and the predator counters are updated in bulk, returns (predators, preys)
+        world = self.world
+        predators, preys = _collision.killPairs(world, self.grid, count)
+        world.dead[preys] = True
+        world.energy[predators] = world.maxEnergy[predators]
+        np.add.at(world.kills, predators, 1) # -> a predator can catch several prey in one tick
+        np.add.at(world.reproduceKills, predators, 1)
+        self.tracker.rekey([world.creatures[idx] for idx in np.unique(predators)])
+        self.totalKills += len(preys)
+        return predators, preys
+
+    def step(self):
+        world, creatures, preys, predators, grid, profiler = self.world, self.creatures, self.preys, self.predators, self.grid, self.profiler
+        profiler.begin()
+        if self.telemetry:
+            self.telemetry.begin(self)
+
+        # -> cast every creature's rays and run every network in batched passes
+        if self.executor is None:
+            intersects = _sensor.senseWorld(world, grid)
+            profiler.lap('sensing')
+            _creatures.thinkAll(world, intersects, grid)
+        elif world.count:
+            origins = world.pos[:world.count].copy()
+            intersects, ends, outputs = self.executor.think(world, grid) # -> the workers run the networks too
+            intersects = _sensor.setWorldRays(world, origins, ends, intersects)
+            profiler.lap('sensing')
+            _creatures.thinkAll(world, intersects, grid, outputs)
+        profiler.lap('inference')
+        world.act() # -> movement for every creature in one go
+        profiler.lap('movement')
+
+        # -> handling reproductions
+        n = world.count
+        isPrey = world.type[:n] == _world.PREY
+        preyReady = isPrey & (world.reproduceTimer[:n] > self.preyReproductionInterval)
+        predReady = ~isPrey & (world.reproduceKills[:n] >= _creatures.Predator.killsToReproduce)
+        world.reproduceTimer[:n][preyReady] = 0
+        world.reproduceKills[:n][predReady] = 0
+        world.age()
+        ready = np.nonzero(preyReady | predReady)[0]
+        offsets = self.streams.reproduction.integers(-20, 20, endpoint=True, size=(len(ready), 2)).tolist()
+        rolls = self.streams.reproduction.random(len(ready)).tolist()
+        for idx, offset, roll in zip(ready.tolist(), offsets, rolls):
+            creatures[idx].reproduce(offset, roll) # -> the child joins the world straight away
+        profiler.lap('reproduction')
+
+        self.resolveKills(n) # -> children are already in preys and predators through the world
+        profiler.lap('kills')
+
+        # -> checking for best performers
+        self.bestPreyPerformer = self.tracker.select(_world.PREY, self.bestPreyPerformer)
+        self.bestPredPerformer = self.tracker.select(_world.PREDATOR, self.bestPredPerformer)
+        profiler.lap('best performers')
+
+        # -> creature spawning
+        if not preys:
+            for _ in range(2): # -> with an archive the mutated spawns come from its hall of fame
+                self.bestPreyPerformer.clone(world=world, brain=self.archive.sample(_world.PREY) if self.archive else None)
+            self.bestPreyPerformer.clone(mutate=False, world=world)
+            spawned = self.bestPreyPerformer.clone(mutate=False, world=world)
+            self.bestPreyPerformer = spawned
+
+        if not predators:
+            for _ in range(2):
+                self.bestPredPerformer.clone(world=world, brain=self.archive.sample(_world.PREDATOR) if self.archive else None)
+            self.bestPredPerformer.clone(mutate=False, world=world)
+            spawned = self.bestPredPerformer.clone(mutate=False, world=world)
+            spawned.kills += 1
+            self.tracker.rekey([spawned])
+            self.bestPredPerformer = spawned
+
+        # -> killing off preys if they grow to much in numbers
+        if len(preys) > self.maxPreys:
+            for idx in self.streams.cull.choice(len(preys), len(preys) - self.maxPreys, replace=False).tolist():
+                preys[idx].dead = True
+        profiler.lap('respawn')
+
+        # -> handling creature deaths
+        removed = world.removeDead() # -> one compaction, creatures, preys and predators all follow it
+        self.tracker.remove(removed)
+        if self.archive:
+            self.archive.record(removed, self.ticks)
+        profiler.lap('death sweep')
+
+        # -> index the survivors for the next tick and for picking
+        grid.build(world.pos[:world.count])
+        profiler.lap('grid')
+        self.ticks += 1
+        if self.checkpointer:
+            self.checkpointer.update(self)
+        if self.telemetry:
+            self.telemetry.update(self)
+        profiler.endTick()
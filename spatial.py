@@ -0,0 +1,54 @@
+import numpy as np
+
+# -> uniform grid spatial hash, rebuilt once per tick from the creature positions
+# -> the grid is laid out as a torus matching the screen, so a query near one edge
+# -> also picks up the cells on the opposite edge that Creature.clampInScreen wraps into
+class SpatialHash:
+
+    def __init__(self, cellSize, screenDimensions):
+        self.cellSize = cellSize
+        self.screenDimensions = screenDimensions
+        self.gridDims = np.array([max(1, int(screenDimensions[0] // cellSize)),
+                                  max(1, int(screenDimensions[1] // cellSize))])
+        self.cellDims = np.array(screenDimensions, dtype=float) / self.gridDims
+        self.cellCount = int(self.gridDims[0] * self.gridDims[1])
+        self.build(np.empty((0, 2)))
+
+    def cellOf(self, positions):
+        cells = np.floor(positions / self.cellDims).astype(int) % self.gridDims
+        return cells[:, 1] * self.gridDims[0] + cells[:, 0]
+
+    def build(self, positions):
+        # -> counting sort of the positions into their cells
+        cells = self.cellOf(positions)
+        self.count = len(positions)
+        self.order = np.argsort(cells, kind='stable')
+        self.cellCounts = np.bincount(cells, minlength=self.cellCount)
+        self.cellStart = np.cumsum(self.cellCounts) - self.cellCounts
+
+    def pairs(self, positions, radii):
+        # -> candidate (query, member) index pairs for every member in a cell touched
+        # -> by the square of half width radii[query] around positions[query]
+        if not len(positions) or not self.count:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        low = np.floor((positions - radii[:, None]) / self.cellDims).astype(int)
+        high = np.floor((positions + radii[:, None]) / self.cellDims).astype(int)
+        spans = np.minimum(high - low + 1, self.gridDims) # -> never visit a cell twice
+
+        # -> expand every query into the cells it covers
+        cellsPerQuery = spans[:, 0] * spans[:, 1]
+        owner = np.repeat(np.arange(len(positions)), cellsPerQuery)
+        local = np.arange(cellsPerQuery.sum()) - np.repeat(np.cumsum(cellsPerQuery) - cellsPerQuery, cellsPerQuery)
+        cellX = (low[owner, 0] + local % spans[owner, 0]) % self.gridDims[0]
+        cellY = (low[owner, 1] + local // spans[owner, 0]) % self.gridDims[1]
+        cells = cellY * self.gridDims[0] + cellX
+
+        # -> expand every covered cell into its members
+        members = self.cellCounts[cells]
+        queries = np.repeat(owner, members)
+        local = np.arange(members.sum()) - np.repeat(np.cumsum(members) - members, members)
+        return queries, self.order[np.repeat(self.cellStart[cells], members) + local]
+
+    def query(self, x, y, radius):
+        # -> indices of everything in the cells around a single point
+        return np.sort(self.pairs(np.array([[x, y]], dtype=float), np.array([radius], dtype=float))[1])
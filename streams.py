@@ -0,0 +1,30 @@
+# -> imports
+import numpy as np
+
+# -> what the simulation draws random numbers for, each purpose has a generator of its own
+purposes = ['spawn', 'brains', 'mutation', 'reproduction', 'cull', 'archive']
+
+# Independent seeded np.random.Generator streams, one per purpose, all spawned from one seed
+# -> drawing more for one purpose never shifts the numbers another one gets, so a run replays exactly
+# -> from its seed and two builds compared on the same seed see the same worlds
+class RandomStreams:
+    def __init__(self, seed=None):
+        self.seed = np.random.SeedSequence(seed)
+        for purpose, child in zip(purposes, self.seed.spawn(len(purposes))):
+            setattr(self, purpose, np.random.default_rng(child))
+
+    @property
+    def entropy(self):
+        # -> the seed that replays this run, also when none was given, None when restored from a state without it
+        return self.seed.entropy if self.seed is not None else None
+
+    def state(self):
+        state = {purpose: getattr(self, purpose).bit_generator.state for purpose in purposes}
+        state['entropy'] = self.entropy
+        return state
+
+    def restore(self, state):
+        # -> in place, so everything holding one of the generators follows, the seed becomes the saved run's
+        for purpose in purposes:
+            getattr(self, purpose).bit_generator.state = state[purpose]
+        self.seed = np.random.SeedSequence(state['entropy']) if state.get('entropy') is not None else None
@@ -0,0 +1,157 @@
+# -> imports
+from world import PREY
+import numpy as np
+import threading
+import queue
+import time
+import json
+import os
+
+# -> histogram bin edges, values past the last edge land in the last bin
+energyEdges = np.linspace(0, 100, 11)
+lifetimeEdges = np.array([0, 60, 300, 600, 1800, 3600, 7200, 18000, 36000, 72000])
+
+def histogram(values, edges):
+    counts = np.bincount(np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2), minlength=len(edges) - 1)
+    return counts.tolist()
+
+def totals(simulation):
+    # -> running totals statistics takes its differences from
+    world = simulation.world
+    return {'serials': world.serials, 'deaths': world.serials - world.count, 'kills': simulation.totalKills}
+
+def statistics(simulation, last):
+    # -> population and evolution record since last, last holds the running totals from the previous record
+    current = totals(simulation)
+    record = {
+        'tick': simulation.ticks,
+        'preys': len(simulation.preys),
+        'predators': len(simulation.predators),
+        'births': current['serials'] - last['serials'],
+        'deaths': current['deaths'] - last['deaths'],
+        'kills': current['kills'] - last['kills'],
+        'bestPrey': simulation.tracker.value(simulation.bestPreyPerformer),
+        'bestPredator': simulation.tracker.value(simulation.bestPredPerformer),
+    }
+    last.update(current)
+    return record
+
+# Streaming run statistics, one record every `every` ticks written to path by a background thread
+# -> update(simulation) after every tick only times the tick, the aggregates are worked out once per record
+# -> records go through a bounded queue and are dropped (and counted) rather than ever blocking the simulation
+# -> path ending in .json or .jsonl writes json lines, anything else csv with the histograms spread over columns
+# -> a run resumed from a checkpoint keeps the records up to its tick and appends after them,
+# -> its first record counts births, deaths and kills from the resumed tick
+class Telemetry:
+    def __init__(self, path, every=60, queueSize=256):
+        self.path = path
+        self.every = every
+        self.jsonLines = path.endswith('.json') or path.endswith('.jsonl')
+        self.queue = queue.Queue(queueSize)
+        self.dropped = 0
+        self.error = None # -> what stopped the writer thread, raised by update and close
+        self.latencies = np.zeros(every) # -> milliseconds of each tick since the last record
+        self.timed = 0
+        self.start = None
+        self.last = None # -> running totals at the last record
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+
+    def begin(self, simulation):
+        if self.last is None: # -> first tick of this run or of a resumed one, the writer opens the file from it
+            self.last = totals(simulation)
+            self.queue.put(simulation.ticks)
+        self.start = time.perf_counter()
+
+    def update(self, simulation):
+        self.check()
+        if self.start is not None:
+            self.latencies[self.timed % self.every] = (time.perf_counter() - self.start) * 1000
+            self.timed += 1
+            self.start = None
+        if simulation.ticks % self.every == 0:
+            try:
+                self.queue.put_nowait(self.record(simulation))
+            except queue.Full:
+                self.dropped += 1
+
+    def record(self, simulation):
+        # -> aggregates over the ticks since the last record
+        world, n = simulation.world, simulation.world.count
+        prey = world.type[:n] == PREY
+        latencies = self.latencies[:min(self.timed, self.every)]
+        self.timed = 0
+        record = statistics(simulation, self.last)
+        record.update({
+            'tickMean': float(latencies.mean()) if len(latencies) else 0.0,
+            'tickP99': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+            'tickMax': float(latencies.max()) if len(latencies) else 0.0,
+            'dropped': self.dropped,
+        })
+        for name, mask in (('prey', prey), ('predator', ~prey)):
+            record[name + 'Energy'] = histogram(world.energy[:n][mask], energyEdges)
+            record[name + 'Lifetime'] = histogram(world.lifetime[:n][mask], lifetimeEdges)
+        return record
+
+    def open(self, tick):
+        # -> a fresh run starts the file over, a resumed one drops the records past its tick
+        # -> returns the file and the csv columns already in it
+        if not tick or not os.path.exists(self.path):
+            return open(self.path, 'w'), None
+        with open(self.path) as file:
+            lines = file.readlines()
+        columns = None
+        if not self.jsonLines and lines:
+            columns, lines = lines[0].rstrip('\n').split(','), lines[1:]
+        tickOf = (lambda line: json.loads(line)['tick']) if self.jsonLines else (lambda line: int(line.split(',', 1)[0]))
+        kept = [line for line in lines if tickOf(line) <= tick]
+        file = open(self.path, 'w')
+        if columns is not None:
+            file.write(','.join(columns) + '\n')
+        file.writelines(kept)
+        return file, columns
+
+    def write(self):
+        # -> writer thread, flushes whenever it has caught up with the queue
+        try:
+            tick = self.queue.get()
+            if tick is None:
+                return
+            file, columns = self.open(tick)
+            with file:
+                while True:
+                    record = self.queue.get()
+                    if record is None:
+                        break
+                    if self.jsonLines:
+                        file.write(json.dumps(record) + '\n')
+                    else:
+                        flat = {}
+                        for key, value in record.items():
+                            if isinstance(value, list):
+                                flat.update((key + str(idx), count) for idx, count in enumerate(value))
+                            else:
+                                flat[key] = value
+                        if columns is None:
+                            columns = list(flat)
+                            file.write(','.join(columns) + '\n')
+                        file.write(','.join(str(flat[column]) for column in columns) + '\n')
+                    if self.queue.empty():
+                        file.flush()
+        except Exception as error:
+            self.error = error
+
+    def check(self):
+        if self.error is not None:
+            raise RuntimeError('telemetry writer for ' + self.path + ' failed') from self.error
+
+    def close(self):
+        # -> waits for the writer to finish everything already queued
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full: # -> only while the writer is still catching up
+                pass
+        self.thread.join()
+        self.check()
@@ -0,0 +1,40 @@
+# -> batched sensing must see exactly what the per creature Sensor.update sees
+# -> python -m pytest test_sensor.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from simulation import Simulation
+import sensor
+import numpy as np
+import pytest
+
+def compare(simulation, batchedGrid):
+    # -> senseWorld first, its rays are read out before Sensor.update replaces them
+    world = simulation.world
+    batched = sensor.senseWorld(world, simulation.grid if batchedGrid else None)
+    batchedEnds = [[ray[1] for ray in creature.sensor.rays] for creature in world.creatures]
+    for creature, intersects, ends in zip(world.creatures, batched, batchedEnds):
+        legacy = creature.sensor.update(world.creatures)
+        assert np.allclose(intersects, legacy, rtol=0, atol=1e-9)
+        assert np.allclose(ends, [ray[1] for ray in creature.sensor.rays], rtol=0, atol=1e-6)
+    return sum(any(intersects) for intersects in batched)
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def testFreshPopulation(seed):
+    simulation = Simulation(seed=seed, preyCount=40, predCount=20)
+    compare(simulation, batchedGrid=False)
+    assert compare(simulation, batchedGrid=True) # -> some creature must see something or nothing was compared
+    simulation.close()
+
+@pytest.mark.parametrize('seed', [4, 5, 6])
+def testEvolvedPopulation(seed):
+    # -> after some ticks creatures have turned, crowded together and been born and killed
+    simulation = Simulation(seed=seed, preyCount=40, predCount=20)
+    seeing = 0
+    for tick in range(200):
+        simulation.step()
+        if tick % 100 == 99:
+            seeing += compare(simulation, batchedGrid=True)
+    assert seeing
+    simulation.close()
@@ -0,0 +1,50 @@
+# -> a seeded run must come out the same however it is run: spread over workers or stopped and resumed
+# -> python -m pytest test_simulation.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from simulation import Simulation
+import checkpoint
+import world as _world
+import numpy as np
+import pytest
+
+def assertSameRun(a, b):
+    # -> every World field, every genome and the totals, bit for bit
+    assert (a.ticks, a.totalKills, a.world.count, a.world.serials) == (b.ticks, b.totalKills, b.world.count, b.world.serials)
+    n = a.world.count
+    for name in _world.fields:
+        assert np.array_equal(getattr(a.world, name)[:n], getattr(b.world, name)[:n]), name
+    for x, y in zip(a.world.creatures, b.world.creatures):
+        assert np.array_equal(x.network.genome.data, y.network.genome.data)
+    for name in ('bestPreyPerformer', 'bestPredPerformer'):
+        x, y = getattr(a, name), getattr(b, name)
+        assert (x.serial, x.lifetime, x.kills) == (y.serial, y.lifetime, y.kills)
+
+@pytest.mark.parametrize('seed', [3, 8])
+def testWorkersMatchSingleProcess(seed):
+    serial = Simulation(seed=seed, preyCount=30, predCount=15)
+    parallel = Simulation(seed=seed, preyCount=30, predCount=15, workers=2)
+    for _ in range(600):
+        serial.step()
+        parallel.step()
+    assertSameRun(serial, parallel)
+    serial.close()
+    parallel.close()
+
+@pytest.mark.parametrize('seed', [1, 4])
+def testResumeContinuesExactly(seed, tmp_path):
+    path = str(tmp_path / 'run.npz')
+    original = Simulation(seed=seed, preyCount=20, predCount=12)
+    for _ in range(700):
+        original.step()
+    checkpoint.save(original, path)
+    resumed = checkpoint.load(path)
+    assertSameRun(original, resumed)
+    for _ in range(1500):
+        original.step()
+        resumed.step()
+    assertSameRun(original, resumed)
+    original.close()
+    resumed.close()
@@ -0,0 +1,221 @@
+from collections.abc import Sequence
+from streams import RandomStreams
+import numpy as np
+
+# -> creature type codes stored in World.type
+PREY = 0
+PREDATOR = 1
+
+# -> the most recurrent memory values a brain can feed back to itself
+memorySize = 4
+
+# -> per creature state, name: (dtype, shape of one slot)
+fields = {
+    'pos': (float, (2,)),
+    'angle': (float, ()),
+    'heading': (float, (2,)), # -> (sin, cos) of the angle, kept in step with it so nothing else calls trig on it
+    'speed': (float, ()),
+    'energy': (float, ()),
+    'maxEnergy': (float, ()),
+    'lifetime': (np.int64, ()),
+    'kills': (np.int64, ()),
+    'reproduceTimer': (np.int64, ()),
+    'reproduceKills': (np.int64, ()),
+    'type': (np.int8, ()),
+    'dead': (bool, ()),
+    'fov': (float, ()),
+    'rayLength': (np.int64, ()),
+    'size': (np.int64, ()),
+    'topSpeed': (float, ()),
+    'topAngle': (float, ()),
+    # -> steering written by the creatures before World.act
+    'turn': (float, ()),
+    'throttle': (float, ()),
+    'controlled': (bool, ()),
+    # -> what each brain's memory outputs said last tick, read back as inputs
+    'memory': (float, (memorySize,)),
+}
+
+# -> property that reads and writes a creature's slot in its World
+def worldField(name):
+    def get(self):
+        return getattr(self.world, name)[self.index].item()
+    def set(self, value):
+        getattr(self.world, name)[self.index] = value
+    return property(get, set)
+
+# -> unit vector (sin, cos) the creatures move along for angles in degrees
+def headingVectors(angles):
+    radians = np.radians(angles)
+    return np.stack([np.sin(radians), np.cos(radians)], axis=-1)
+
+# -> the angle property, writing it also updates the heading vector
+def angleField():
+    field = worldField('angle')
+    def set(self, value):
+        field.fset(self, value)
+        self.world.heading[self.index] = headingVectors(self.world.angle[self.index])
+    return property(field.fget, set)
+
+# Structure of arrays holding every creature, creatures are views into slot creatures[i]
+class World:
+
+    def __init__(self, screenDimensions, capacity=64, streams=None):
+        self.screenDimensions = screenDimensions
+        self.streams = streams if streams is not None else RandomStreams() # -> where the creatures draw their randomness from
+        self.count = 0
+        self.creatures = []
+        self.generation = 0 # -> bumped whenever creatures join or leave, invalidates the type views
+        self.serials = 0 # -> creature.serial counts up in the order creatures joined, which is also world order
+        self.ages = 0 # -> how many times age() has run
+        self.views = {}
+        for name, (dtype, shape) in fields.items():
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+    def members(self, code):
+        # -> the live view of every creature of one type, shared by everyone who asks
+        if code not in self.views:
+            self.views[code] = TypeView(self, code)
+        return self.views[code]
+
+    @property
+    def capacity(self):
+        return len(self.angle)
+
+    def grow(self):
+        for name in fields:
+            array = getattr(self, name)
+            grown = np.zeros((len(array) * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    def add(self, creature):
+        # -> claims the next slot for a creature view and returns its index
+        if self.count == self.capacity:
+            self.grow()
+        index = self.count
+        for name in fields:
+            getattr(self, name)[index] = 0
+        self.count += 1
+        self.generation += 1
+        creature.serial = self.serials
+        self.serials += 1
+        self.creatures.append(creature)
+        return index
+
+    def removeDead(self):
+        # -> compacts the arrays over the living creatures and reindexes the views
+        alive = ~self.dead[:self.count]
+        if alive.all():
+            return []
+        # -> everything before the first death keeps its slot, only the tail is touched
+        first = int(np.argmin(alive))
+        tail = self.creatures[first:]
+        removed = [creature for creature, keep in zip(tail, alive[first:]) if not keep]
+        self.detach(first + np.nonzero(~alive[first:])[0]) # -> removed creatures keep a copy of their state
+        for name in fields:
+            array = getattr(self, name)
+            kept = array[first:self.count][alive[first:]]
+            array[first:first + len(kept)] = kept
+        self.creatures[first:] = [creature for creature, keep in zip(tail, alive[first:]) if keep]
+        self.count = len(self.creatures)
+        self.generation += 1
+        for index in range(first, self.count):
+            self.creatures[index].index = index
+        return removed
+
+    def detach(self, indices):
+        # -> copies the slots at indices into one World of their own and points their creatures at it,
+        # -> so removed creatures can still be read, one allocation per sweep however many died
+        world = World(self.screenDimensions, capacity=len(indices), streams=self.streams)
+        for name in fields:
+            getattr(world, name)[:] = getattr(self, name)[indices]
+        world.creatures = [self.creatures[index] for index in indices.tolist()]
+        world.count = world.serials = len(world.creatures) # -> the creatures keep the serials they had here
+        for index, creature in enumerate(world.creatures):
+            creature.world, creature.index = world, index
+        return world
+
+    def act(self):
+        # -> applies the steering of every creature at once: turning, energy use, movement and wrap around
+        n = self.count
+        prey = self.type[:n] == PREY
+        pred = ~prey
+        angle, speed, energy = self.angle[:n], self.speed[:n], self.energy[:n]
+        turn, throttle, controlled = self.turn[:n], self.throttle[:n], self.controlled[:n]
+
+        # -> predators out of energy die before they move
+        starving = pred & (energy <= 0) & ~self.dead[:n]
+        self.dead[:n] |= starving
+        for index in np.nonzero(starving)[0]:
+            self.creatures[index].selected = False
+            self.creatures[index].remoteControlled = False
+        active = ~self.dead[:n]
+
+        # -> neural network steering, remote controlled creatures already set their own
+        auto = active & ~controlled
+        angle[auto] += turn[auto]
+        self.heading[:n] = headingVectors(angle) # -> once per tick, sensing and drawing reuse it until the next act
+        speed[auto & pred] = throttle[auto & pred]
+        autoPrey = auto & prey
+        speed[autoPrey] = np.where(energy[autoPrey] - 0.25 * throttle[autoPrey] > 0, throttle[autoPrey], 0)
+        manualPrey = active & controlled & prey
+        speed[manualPrey] = np.where(energy[manualPrey] > 0, speed[manualPrey], 0)
+
+        # -> idle prey regain energy, moving prey need enough energy for the step
+        idle = active & prey & (speed == 0)
+        energy[idle & (energy < self.maxEnergy[:n])] += 0.25
+        movingPrey = active & prey & (speed != 0) & (energy - 0.25 * speed > 0)
+        movingPred = active & pred
+        moving = movingPrey | movingPred
+
+        heading = self.heading[:n][moving]
+        self.pos[:n][moving, 0] -= heading[:, 0] * speed[moving]
+        self.pos[:n][moving, 1] -= heading[:, 1] * speed[moving]
+        energy[movingPrey] -= 0.2 * speed[movingPrey]
+        energy[movingPred] -= np.maximum(speed[movingPred] * 0.2, 0.05) # -> energy usage must be at least 0.05 so they dont live forever
+        self.clampInScreen(moving)
+
+    def clampInScreen(self, mask):
+        # -> wraps creatures that left the screen round to the other side
+        x, y = self.pos[:self.count, 0], self.pos[:self.count, 1]
+        width, height = self.screenDimensions
+        x[mask & (x < 0)] = width - 1
+        x[mask & (x > width)] = 0
+        y[mask & (y < 0)] = height
+        y[mask & (y > height)] = 0
+
+    def age(self):
+        # -> one tick older, prey also count down to their next reproduction
+        n = self.count
+        self.ages += 1
+        self.lifetime[:n] += 1
+        self.reproduceTimer[:n][self.type[:n] == PREY] += 1
+
+# Read only list of the creatures of one type, in world order, kept in sync with the World
+# -> the member list is rebuilt from the type array only when the world's generation has
+# -> moved on, so births and deaths cost nothing here until someone reads the view
+class TypeView(Sequence):
+
+    def __init__(self, world, code):
+        self.world = world
+        self.code = code
+        self.generation = -1
+        self.cached = []
+
+    def refresh(self):
+        world = self.world
+        if self.generation != world.generation:
+            indices = np.nonzero(world.type[:world.count] == self.code)[0]
+            self.cached = [world.creatures[index] for index in indices]
+            self.generation = world.generation
+        return self.cached
+
+    def __len__(self):
+        return len(self.refresh())
+
+    def __getitem__(self, index):
+        return self.refresh()[index]
+
+    def __iter__(self):
+        return iter(self.refresh())